@@ -1,6 +1,14 @@
 import re
 import string
-from .pathfeatures import PathFeature, PATH_PATTERN
+try:
+    from inspect import getfullargspec as getargspec
+except ImportError:
+    from inspect import getargspec
+try:
+    from sys import intern
+except ImportError:
+    pass
+from .pathfeatures import PathFeature, PATH_PATTERN, _path_match
 from .util import ReadableException
 
 class Constraint(PathFeature):
@@ -12,6 +20,7 @@ class Constraint(PathFeature):
     simply defines the type of element for the 
     purposes of serialisation.
     """
+    __slots__ = ()
     child_type = "constraint"
 
 class LogicNode(object):
@@ -24,6 +33,8 @@ class LogicNode(object):
     inherit from this class, which defines 
     methods for overloading built-in operations.
     """
+    __slots__ = ()
+    _is_logic_node = True
 
     def __add__(self, other):
         """
@@ -38,10 +49,10 @@ class LogicNode(object):
             ... A and B and C
 
         """
-        if not isinstance(other, LogicNode):
-            return NotImplemented
-        else:
+        if getattr(other, '_is_logic_node', False):
             return LogicGroup(self, 'AND', other)
+        else:
+            return NotImplemented
 
     def __and__(self, other):
         """
@@ -55,10 +66,10 @@ class LogicNode(object):
             ... A and B
 
         """
-        if not isinstance(other, LogicNode):
-            return NotImplemented
-        else:
+        if getattr(other, '_is_logic_node', False):
             return LogicGroup(self, 'AND', other)
+        else:
+            return NotImplemented
 
     def __or__(self, other):
         """
@@ -72,10 +83,10 @@ class LogicNode(object):
             ... A or B
 
         """
-        if not isinstance(other, LogicNode):
-            return NotImplemented
-        else:
+        if getattr(other, '_is_logic_node', False):
             return LogicGroup(self, 'OR', other)
+        else:
+            return NotImplemented
 
 class LogicGroup(LogicNode):
     """
@@ -86,7 +97,9 @@ class LogicGroup(LogicNode):
     either connected by AND or by OR logic.
     """
 
-    LEGAL_OPS = frozenset(['AND', 'OR'])
+    __slots__ = ('parent', 'left', 'right', 'op')
+    LEGAL_OPS = frozenset(map(intern, ['AND', 'OR']))
+    SEPARATORS = {'AND': ' and ', 'OR': ' or '}
 
     def __init__(self, left, op, right, parent=None):
         """
@@ -120,8 +133,45 @@ class LogicGroup(LogicNode):
         string version should be able to be parsed back into the
         original logic group.
         """
-        core = ' '.join(map(str, [self.left, self.op.lower(), self.right]))
+        out = []
+        self._flatten(out)
+        core = self.SEPARATORS[self.op].join(out)
         return '(' + core + ')' if self.parent and self.op != self.parent.op else core
+
+    def _flatten(self, out):
+        """
+        Append the string forms of the operands of this group to out, 
+        descending into sub-groups which share this group's operator 
+        rather than stringifying each of them separately.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, LogicGroup) and node.op == self.op:
+                stack.append(node.right)
+                stack.append(node.left)
+            else:
+                out.append(str(node))
+
+    def clone(self, constraints):
+        """
+        Copy this group and its sub-groups
+        ==================================
+
+        The constraints in the copy are replaced by the ones
+        in the given dictionary with the same code, if present.
+
+        @param constraints: the constraints of the copy, keyed by code
+        @type constraints: dict
+        """
+        nodes = []
+        for node in (self.left, self.right):
+            if isinstance(node, LogicGroup):
+                nodes.append(node.clone(constraints))
+            else:
+                nodes.append(constraints.get(node.code, node))
+        return LogicGroup(nodes[0], self.op, nodes[1])
+
     def get_codes(self):
         """
         Get a list of all constraint codes used in this group.
@@ -163,6 +213,7 @@ class LogicParser(object):
         @type query: intermine.query.Query
         """
         self._query = query
+        self._cache = {}
 
     def get_constraint(self, code):
         """
@@ -211,6 +262,8 @@ class LogicParser(object):
         ")"   : ")"
     }
 
+    CACHE_SIZE = 32
+
     def parse(self, logic_str):
         """
         Parse a logic string into an abstract syntax tree
@@ -223,6 +276,9 @@ class LogicParser(object):
 
         Note that only singly rooted trees are parsed.
 
+        Trees are cached by logic string and set of constraint codes,
+        and each call returns a fresh copy of the cached tree.
+
         @param logic_str: The logic defininition as a string
         @type logic_str: string
 
@@ -230,6 +286,22 @@ class LogicParser(object):
 
         @raise LogicParseError: if there is a syntax error in the logic
         """
+        constraints = self._query.constraint_dict
+        key = (logic_str, frozenset(constraints))
+        tree = self._cache.get(key)
+        if tree is None:
+            tree = self._parse(logic_str)
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            self._cache[key] = tree
+        if isinstance(tree, LogicGroup):
+            return tree.clone(constraints)
+        return constraints.get(tree.code, tree)
+
+    def _parse(self, logic_str):
+        """
+        Parse a logic string, without consulting the cache
+        """
         def flatten(l): 
             """Flatten out a list which contains both values and sublists"""
             ret = []
@@ -387,7 +459,8 @@ class CodedConstraint(Constraint, LogicNode):
     inherited from to supply default behaviour.
     """
 
-    OPS = set([])
+    __slots__ = ('op', 'code')
+    OPS = frozenset()
 
     def __init__(self, path, op, code="A"):
         """
@@ -402,7 +475,7 @@ class CodedConstraint(Constraint, LogicNode):
         """
         if op not in self.OPS:
             raise TypeError(op + " not in " + str(self.OPS))
-        self.op = op
+        self.op = intern(op) if isinstance(op, str) else op
         self.code = code
         super(CodedConstraint, self).__init__(path)
 
@@ -416,17 +489,27 @@ class CodedConstraint(Constraint, LogicNode):
         Provide a human readable representation of the logic. 
         This method is called by repr.
         """
-        s = super(CodedConstraint, self).to_string()
-        return " ".join([s, self.op])
+        return self._make_string()
 
     def to_dict(self):
         """
         Return a dict object which can be used to construct a 
         DOM element with the appropriate attributes.
         """
-        d = super(CodedConstraint, self).to_dict()
-        d.update(op=self.op, code=self.code)
-        return d
+        return self._make_dict()
+
+    def _make_string(self):
+        """
+        Build the human readable representation of the logic.
+        """
+        s = super(CodedConstraint, self).to_string()
+        return s + " " + self.op
+
+    def _make_dict(self):
+        """
+        Build the dict of attributes for serialisation.
+        """
+        return {'path': self.path, 'op': self.op, 'code': self.code}
     
 class UnaryConstraint(CodedConstraint):
     """
@@ -440,7 +523,8 @@ class UnaryConstraint(CodedConstraint):
      - IS NOT NULL
 
     """
-    OPS = set(['IS NULL', 'IS NOT NULL'])
+    __slots__ = ()
+    OPS = frozenset(map(intern, ['IS NULL', 'IS NOT NULL']))
 
 class BinaryConstraint(CodedConstraint):
     """
@@ -467,7 +551,8 @@ class BinaryConstraint(CodedConstraint):
      - NOT LIKE (same as not equal to, but with implied wildcards)
 
     """
-    OPS = set(['=', '!=', '<', '>', '<=', '>=', 'LIKE', 'NOT LIKE', 'CONTAINS'])
+    __slots__ = ('value',)
+    OPS = frozenset(map(intern, ['=', '!=', '<', '>', '<=', '>=', 'LIKE', 'NOT LIKE', 'CONTAINS']))
     def __init__(self, path, op, value, code="A"):
         """
         Constructor
@@ -488,21 +573,20 @@ class BinaryConstraint(CodedConstraint):
         self.value = value
         super(BinaryConstraint, self).__init__(path, op, code)
 
-    def to_string(self):
+    def _make_string(self):
         """
         Provide a human readable representation of the logic. 
         This method is called by repr.
         """
-        s = super(BinaryConstraint, self).to_string()
-        return " ".join([s, str(self.value)])
-    def to_dict(self):
+        s = super(BinaryConstraint, self)._make_string()
+        return s + " " + str(self.value)
+    def _make_dict(self):
         """
         Return a dict object which can be used to construct a 
         DOM element with the appropriate attributes.
         """
-        d = super(BinaryConstraint, self).to_dict()
-        d.update(value=str(self.value))
-        return d
+        return {'path': self.path, 'op': self.op, 'code': self.code,
+                'value': str(self.value)}
 
 class ListConstraint(CodedConstraint):
     """
@@ -522,26 +606,26 @@ class ListConstraint(CodedConstraint):
      - NOT IN
 
      """
-    OPS = set(['IN', 'NOT IN'])
+    __slots__ = ('list_name',)
+    OPS = frozenset(map(intern, ['IN', 'NOT IN']))
     def __init__(self, path, op, list_name, code="A"):
         self.list_name = list_name
         super(ListConstraint, self).__init__(path, op, code)
 
-    def to_string(self):
+    def _make_string(self):
         """
         Provide a human readable representation of the logic. 
         This method is called by repr.
         """
-        s = super(ListConstraint, self).to_string()
-        return " ".join([s, str(self.list_name)])
-    def to_dict(self):
+        s = super(ListConstraint, self)._make_string()
+        return s + " " + str(self.list_name)
+    def _make_dict(self):
         """
         Return a dict object which can be used to construct a 
         DOM element with the appropriate attributes.
         """
-        d = super(ListConstraint, self).to_dict()
-        d.update(value=str(self.list_name))
-        return d
+        return {'path': self.path, 'op': self.op, 'code': self.code,
+                'value': str(self.list_name)}
 
 class LoopConstraint(CodedConstraint):
     """
@@ -559,7 +643,8 @@ class LoopConstraint(CodedConstraint):
     are used in XML serialisation.
 
     """
-    OPS = set(['IS', 'IS NOT'])
+    __slots__ = ('loopPath',)
+    OPS = frozenset(map(intern, ['IS', 'IS NOT']))
     SERIALISED_OPS = {'IS':'=', 'IS NOT':'!='}
     def __init__(self, path, op, loopPath, code="A"):
         """
@@ -581,21 +666,20 @@ class LoopConstraint(CodedConstraint):
         self.loopPath = loopPath
         super(LoopConstraint, self).__init__(path, op, code)
 
-    def to_string(self):
+    def _make_string(self):
         """
         Provide a human readable representation of the logic. 
         This method is called by repr.
         """
-        s = super(LoopConstraint, self).to_string()
-        return " ".join([s, self.loopPath])
-    def to_dict(self):
+        s = super(LoopConstraint, self)._make_string()
+        return s + " " + self.loopPath
+    def _make_dict(self):
         """
         Return a dict object which can be used to construct a 
         DOM element with the appropriate attributes.
         """
-        d = super(LoopConstraint, self).to_dict()
-        d.update(loopPath=self.loopPath, op=self.SERIALISED_OPS[self.op])
-        return d
+        return {'path': self.path, 'op': self.SERIALISED_OPS[self.op],
+                'code': self.code, 'loopPath': self.loopPath}
     
 class TernaryConstraint(BinaryConstraint):
     """
@@ -612,7 +696,8 @@ class TernaryConstraint(BinaryConstraint):
     To aid disambiguation, Ternary constaints accept an extra_value as 
     well as the main value.
     """
-    OPS = set(['LOOKUP'])
+    __slots__ = ('extra_value',)
+    OPS = frozenset(map(intern, ['LOOKUP']))
     def __init__(self, path, op, value, extra_value=None, code="A"):
         """
         Constructor
@@ -638,24 +723,25 @@ class TernaryConstraint(BinaryConstraint):
         self.extra_value = extra_value
         super(TernaryConstraint, self).__init__(path, op, value, code)
 
-    def to_string(self):
+    def _make_string(self):
         """
         Provide a human readable representation of the logic. 
         This method is called by repr.
         """
-        s = super(TernaryConstraint, self).to_string()
+        s = super(TernaryConstraint, self)._make_string()
         if self.extra_value is None:
             return s
         else:
-            return " ".join([s, 'IN', self.extra_value])
-    def to_dict(self):
+            return s + " IN " + self.extra_value
+    def _make_dict(self):
         """
         Return a dict object which can be used to construct a 
         DOM element with the appropriate attributes.
         """
-        d = super(TernaryConstraint, self).to_dict()
+        d = {'path': self.path, 'op': self.op, 'code': self.code,
+             'value': str(self.value)}
         if self.extra_value is not None:
-            d.update(extraValue=self.extra_value)
+            d['extraValue'] = self.extra_value
         return d
 
 class MultiConstraint(CodedConstraint):
@@ -678,7 +764,8 @@ class MultiConstraint(CodedConstraint):
       - The object of the constaint is the value of an attribute, rather
         than an object's identity.
     """
-    OPS = set(['ONE OF', 'NONE OF'])
+    __slots__ = ('values',)
+    OPS = frozenset(map(intern, ['ONE OF', 'NONE OF']))
     def __init__(self, path, op, values, code="A"):
         """
         Constructor
@@ -701,21 +788,29 @@ class MultiConstraint(CodedConstraint):
         self.values = values
         super(MultiConstraint, self).__init__(path, op, code)
 
-    def to_string(self):
+    def clone(self):
+        """
+        Return a copy of the constraint, with its own copy of the values.
+        """
+        clone = super(MultiConstraint, self).clone()
+        values = self.values
+        clone.values = values[:] if isinstance(values, list) else set(values)
+        return clone
+
+    def _make_string(self):
         """
         Provide a human readable representation of the logic. 
         This method is called by repr.
         """
-        s = super(MultiConstraint, self).to_string()
-        return ' '.join([s, str(self.values)])
-    def to_dict(self):
+        s = super(MultiConstraint, self)._make_string()
+        return s + " " + str(self.values)
+    def _make_dict(self):
         """
         Return a dict object which can be used to construct a 
         DOM element with the appropriate attributes.
         """
-        d = super(MultiConstraint, self).to_dict()
-        d.update(value=self.values)
-        return d
+        return {'path': self.path, 'op': self.op, 'code': self.code,
+                'value': list(self.values)}
 
 class SubClassConstraint(Constraint):
     """
@@ -735,6 +830,7 @@ class SubClassConstraint(Constraint):
     in an InterMine query), they do not have codes 
     and cannot be referenced in logic expressions.
     """
+    __slots__ = ('subclass',)
     def __init__(self, path, subclass):
         """
         Constructor
@@ -746,25 +842,29 @@ class SubClassConstraint(Constraint):
         @param subclass: The class to subclass the path to. This must be a simple class name (not a dotted name)
         @type subclass: str
         """
-        if not PATH_PATTERN.match(subclass):
-             raise TypeError
+        if not _path_match(subclass):
+            raise TypeError("Bad subclass: '" + subclass 
+                    + "' does not match expected pattern " + PATH_PATTERN.pattern)
         self.subclass = subclass
         super(SubClassConstraint, self).__init__(path)
     def to_string(self):
-       """
-       Provide a human readable representation of the logic. 
-       This method is called by repr.
-       """
-       s = super(SubClassConstraint, self).to_string()
-       return s + ' ISA ' + self.subclass
+        """
+        Provide a human readable representation of the logic. 
+        This method is called by repr.
+        """
+        return self._make_string()
+    def _make_string(self):
+        """
+        Build the human readable representation of the logic.
+        """
+        s = super(SubClassConstraint, self).to_string()
+        return s + ' ISA ' + self.subclass
     def to_dict(self):
-       """
-       Return a dict object which can be used to construct a 
-       DOM element with the appropriate attributes.
-       """
-       d = super(SubClassConstraint, self).to_dict()
-       d.update(type=self.subclass) 
-       return d
+        """
+        Return a dict object which can be used to construct a 
+        DOM element with the appropriate attributes.
+        """
+        return {'path': self.path, 'type': self.subclass}
 
 
 class TemplateConstraint(object):
@@ -781,6 +881,7 @@ class TemplateConstraint(object):
     REQUIRED = "locked"
     OPTIONAL_ON = "on"
     OPTIONAL_OFF = "off"
+    ARG_NAMES = frozenset(["editable", "optional"])
     def __init__(self, editable=True, optional="locked"):
         """
         Constructor
@@ -851,107 +952,114 @@ class TemplateConstraint(object):
         arguments for the main constraint, and one with arguments for the template
         portion of the behaviour
         """
-        c_args = {}
-        t_args = {}
-        for k, v in args.items():
-            if k == "editable": 
-                t_args[k] = v == "true"
-            elif k == "optional": 
-                t_args[k] = v
-            else:
-                c_args[k] = v
+        t_keys = self.ARG_NAMES.intersection(args)
+        if not t_keys:
+            return (args, {})
+        t_args = dict((k, args[k]) for k in t_keys)
+        if "editable" in t_args:
+            t_args["editable"] = t_args["editable"] == "true"
+        c_args = dict((k, v) for k, v in args.items() if k not in t_keys)
         return (c_args, t_args)
 
-class TemplateUnaryConstraint(UnaryConstraint, TemplateConstraint):
-    def __init__(self, *a, **d):
-        (c_args, t_args) = self.separate_arg_sets(d)
-        UnaryConstraint.__init__(self, *a, **c_args)
-        TemplateConstraint.__init__(self, **t_args)
-    def to_string(self):
-        """
-        Provide a template specific human readable representation of the 
-        constraint. This method is called by repr.
-        """
-        return(UnaryConstraint.to_string(self) 
-                + " " + TemplateConstraint.to_string(self))
+class _TemplateMixin(TemplateConstraint):
+    """
+    The shared implementation of the template constraint classes
+    =============================================================
 
-class TemplateBinaryConstraint(BinaryConstraint, TemplateConstraint):
+    Each template constraint class puts this mixin before the 
+    constraint class it extends, and names that class as its 
+    C{_base}. Construction and stringification are then delegated 
+    to the base class, with the template portion added on.
+    """
+    _base = None
     def __init__(self, *a, **d):
         (c_args, t_args) = self.separate_arg_sets(d)
-        BinaryConstraint.__init__(self, *a, **c_args)
+        self._base.__init__(self, *a, **c_args)
         TemplateConstraint.__init__(self, **t_args)
     def to_string(self):
         """
         Provide a template specific human readable representation of the 
         constraint. This method is called by repr.
         """
-        return(BinaryConstraint.to_string(self) 
+        return self._base.to_string(self)
+    def _make_string(self):
+        return(self._base._make_string(self) 
                 + " " + TemplateConstraint.to_string(self))
 
-class TemplateListConstraint(ListConstraint, TemplateConstraint):
-    def __init__(self, *a, **d):
-        (c_args, t_args) = self.separate_arg_sets(d)
-        ListConstraint.__init__(self, *a, **c_args)
-        TemplateConstraint.__init__(self, **t_args)
-    def to_string(self):
-        """
-        Provide a template specific human readable representation of the 
-        constraint. This method is called by repr.
-        """
-        return(ListConstraint.to_string(self) 
-                + " " + TemplateConstraint.to_string(self))
+class TemplateUnaryConstraint(_TemplateMixin, UnaryConstraint):
+    _base = UnaryConstraint
 
-class TemplateLoopConstraint(LoopConstraint, TemplateConstraint):
-    def __init__(self, *a, **d):
-        (c_args, t_args) = self.separate_arg_sets(d)
-        LoopConstraint.__init__(self, *a, **c_args)
-        TemplateConstraint.__init__(self, **t_args)
-    def to_string(self):
-        """
-        Provide a template specific human readable representation of the 
-        constraint. This method is called by repr.
-        """
-        return(LoopConstraint.to_string(self) 
-                + " " + TemplateConstraint.to_string(self))
+class TemplateBinaryConstraint(_TemplateMixin, BinaryConstraint):
+    _base = BinaryConstraint
 
-class TemplateTernaryConstraint(TernaryConstraint, TemplateConstraint):
-    def __init__(self, *a, **d):
-        (c_args, t_args) = self.separate_arg_sets(d)
-        TernaryConstraint.__init__(self, *a, **c_args)
-        TemplateConstraint.__init__(self, **t_args)
-    def to_string(self):
-        """
-        Provide a template specific human readable representation of the 
-        constraint. This method is called by repr.
-        """
-        return(TernaryConstraint.to_string(self) 
-                + " " + TemplateConstraint.to_string(self))
+class TemplateListConstraint(_TemplateMixin, ListConstraint):
+    _base = ListConstraint
 
-class TemplateMultiConstraint(MultiConstraint, TemplateConstraint):
-    def __init__(self, *a, **d):
-        (c_args, t_args) = self.separate_arg_sets(d)
-        MultiConstraint.__init__(self, *a, **c_args)
-        TemplateConstraint.__init__(self, **t_args)
-    def to_string(self):
-        """
-        Provide a template specific human readable representation of the 
-        constraint. This method is called by repr.
-        """
-        return(MultiConstraint.to_string(self) 
-                + " " + TemplateConstraint.to_string(self))
+class TemplateLoopConstraint(_TemplateMixin, LoopConstraint):
+    _base = LoopConstraint
 
-class TemplateSubClassConstraint(SubClassConstraint, TemplateConstraint):
-    def __init__(self, *a, **d):
-        (c_args, t_args) = self.separate_arg_sets(d)
-        SubClassConstraint.__init__(self, *a, **c_args)
-        TemplateConstraint.__init__(self, **t_args)
-    def to_string(self):
-        """
-        Provide a template specific human readable representation of the 
-        constraint. This method is called by repr.
-        """
-        return(SubClassConstraint.to_string(self) 
-                + " " + TemplateConstraint.to_string(self))
+class TemplateTernaryConstraint(_TemplateMixin, TernaryConstraint):
+    _base = TernaryConstraint
+
+class TemplateMultiConstraint(_TemplateMixin, MultiConstraint):
+    _base = MultiConstraint
+
+class TemplateSubClassConstraint(_TemplateMixin, SubClassConstraint):
+    _base = SubClassConstraint
+
+def _init_signature(cls):
+    """
+    Return the (names, required names) of the arguments a class's 
+    constructor accepts, skipping over constructors that just pass
+    on their arguments. Template constraints take the signature of 
+    their base class.
+    """
+    base = getattr(cls, "_base", None) or cls
+    for klass in base.__mro__:
+        init = klass.__dict__.get("__init__")
+        if init is None:
+            continue
+        args, varargs, varkw, defaults = getargspec(init)[:4]
+        if varargs is None and varkw is None:
+            names = tuple(args[1:])
+            required = names[:len(names) - len(defaults or ())]
+            return (names, frozenset(required))
+    return ((), frozenset())
+
+def _accepts(cls, n_args, kwarg_names, extra_names):
+    """
+    Whether a constraint class can be called with n_args positional
+    arguments and the given keyword argument names.
+    """
+    names, required = _init_signature(cls)
+    if n_args > len(names):
+        return False
+    positional = frozenset(names[:n_args])
+    keywords = kwarg_names - extra_names
+    if keywords & positional or not keywords <= frozenset(names):
+        return False
+    return required <= (positional | keywords)
+
+_DISPATCH = {}
+
+_OP_INDEX = {}
+
+def _op_index(factory):
+    """
+    Return a dict from each operator to the constraint class of 
+    the given factory that uses it.
+    """
+    index = _OP_INDEX.get(factory)
+    if index is None:
+        index = {}
+        for CC in factory.CONSTRAINT_CLASSES:
+            for op in getattr(CC, "OPS", ()):
+                index[op] = CC
+        _OP_INDEX[factory] = index
+    return index
+
+_CODES = tuple(string.ascii_uppercase) + tuple([a + b 
+    for a in string.ascii_uppercase for b in string.ascii_uppercase])
 
 class ConstraintFactory(object):
     """
@@ -960,12 +1068,15 @@ class ConstraintFactory(object):
 
     A constraint factory is responsible for finding an appropriate
     constraint class for the given arguments and instantiating the 
-    constraint.
+    constraint. Candidate classes are tried in the order of 
+    CONSTRAINT_CLASSES, from the most specific to the least.
     """
-    CONSTRAINT_CLASSES = set([
-        UnaryConstraint, BinaryConstraint, TernaryConstraint, 
-        MultiConstraint, SubClassConstraint, LoopConstraint,
-        ListConstraint])
+    CONSTRAINT_CLASSES = (
+        TernaryConstraint, BinaryConstraint, MultiConstraint, 
+        UnaryConstraint, LoopConstraint, ListConstraint,
+        SubClassConstraint)
+
+    EXTRA_ARGS = frozenset()
 
     def __init__(self):
         """
@@ -974,16 +1085,47 @@ class ConstraintFactory(object):
 
         Creates a new ConstraintFactory
         """
-        self._codes = iter(string.ascii_uppercase)
+        self._code_index = 0
     
     def get_next_code(self):
         """
         Return the available constraint code.
 
-        @return: A single uppercase character
+        Codes run from A to Z, and then from AA to ZZ.
+
+        @return: One or two uppercase characters
         @rtype: str
         """
-        return self._codes.next()
+        code = _CODES[self._code_index]
+        self._code_index += 1
+        return code
+
+    def get_candidates(self, args, kwargs):
+        """
+        Get the constraint classes which accept the given arguments
+        -----------------------------------------------------------
+
+        The candidates are determined by the number of positional 
+        arguments and the names of the keyword arguments, and are only 
+        worked out once for each such shape of call. If the operator 
+        belongs to one of these classes, only that class is returned, 
+        and otherwise classes that have an operator set are only 
+        returned if the operator is in it.
+
+        @rtype: list
+        """
+        kwarg_names = frozenset(kwargs)
+        key = (self.__class__, len(args), kwarg_names)
+        classes = _DISPATCH.get(key)
+        if classes is None:
+            classes = tuple([CC for CC in self.CONSTRAINT_CLASSES 
+                if _accepts(CC, len(args), kwarg_names, self.EXTRA_ARGS)])
+            _DISPATCH[key] = classes
+        op = args[1] if len(args) > 1 else kwargs.get("op")
+        CC = _op_index(self.__class__).get(op)
+        if CC in classes:
+            return [CC]
+        return [CC for CC in classes if not hasattr(CC, "OPS") or op in CC.OPS]
 
     def make_constraint(self, *args, **kwargs):
         """
@@ -994,12 +1136,12 @@ class ConstraintFactory(object):
 
         @rtype: Constraint
         """
-        for CC in self.CONSTRAINT_CLASSES:
+        for CC in self.get_candidates(args, kwargs):
             try:
                 c = CC(*args, **kwargs)
                 if hasattr(c, "code"): c.code = self.get_next_code()
                 return c
-            except TypeError, e:
+            except TypeError:
                 pass
         raise TypeError("No matching constraint class found for " 
             + str(args) + ", " + str(kwargs))
@@ -1014,9 +1156,10 @@ class TemplateConstraintFactory(ConstraintFactory):
     constraint. TemplateConstraintFactories make constraints with the 
     extra set of TemplateConstraint qualities.
     """
-    CONSTRAINT_CLASSES = set([
-        TemplateUnaryConstraint, TemplateBinaryConstraint, 
-        TemplateTernaryConstraint, TemplateMultiConstraint,
-        TemplateSubClassConstraint, TemplateLoopConstraint, 
-        TemplateListConstraint
-    ])
+    CONSTRAINT_CLASSES = (
+        TemplateTernaryConstraint, TemplateBinaryConstraint, 
+        TemplateMultiConstraint, TemplateUnaryConstraint, 
+        TemplateLoopConstraint, TemplateListConstraint,
+        TemplateSubClassConstraint)
+
+    EXTRA_ARGS = TemplateConstraint.ARG_NAMES
@@ -1,6 +1,13 @@
 import weakref
 import urllib
 
+_OPERAND_COLLECTIONS = (list, tuple, set, frozenset)
+
+def _as_operands(other):
+    if isinstance(other, _OPERAND_COLLECTIONS):
+        return list(other)
+    return [other]
+
 
 class List(object):
     """
@@ -40,6 +47,12 @@ class List(object):
         * Asymmetric Difference (subtraction): this - that
         * Appending: this += that
 
+    The right hand side of any operation may also be a list, tuple or set 
+    of operands, in which case all of them are combined in a single request
+    to the webservice, rather than one request per pair:
+
+        combined_list = new_list | [another_list, a_third_list]
+
     Lists can be created from a list of identifiers that could be:
         * stored in a file
         * held in a list or set
@@ -166,21 +179,22 @@ class List(object):
         q = self.to_query()
         attributes = q.model.get_class(self.list_type).attributes
         q.clear_view()
-        q.add_view(map(lambda x: self.list_type + "." + x.name, attributes))
+        prefix = self.list_type + "."
+        q.add_view([prefix + a.name for a in attributes])
         return q
 
     def __and__(self, other):
         """
         Intersect this list and another
         """
-        return self.manager.intersect([self, other])
+        return self.manager.intersect([self] + _as_operands(other))
 
     def __iand__(self, other):
         """
         Intersect this list and another, and replace this list with the result of the
         intersection
         """
-        intersection = self.manager.intersect([self, other], description=self.description, tags=self.tags)
+        intersection = self.manager.intersect([self] + _as_operands(other), description=self.description, tags=self.tags)
         self.delete()
         intersection.name = self.name
         return intersection
@@ -189,13 +203,13 @@ class List(object):
         """ 
         Return the union of this list and another
         """
-        return self.manager.union([self, other])
+        return self.manager.union([self] + _as_operands(other))
 
     def __add__(self, other):
         """ 
         Return the union of this list and another
         """
-        return self.manager.union([self, other])
+        return self.manager.union([self] + _as_operands(other))
 
     def __iadd__(self, other):
         """ 
@@ -207,26 +221,27 @@ class List(object):
         name = self.name
         data = None
 
-        try:
-            ids = open(content).read()
-        except (TypeError, IOError):
-            if isinstance(content, basestring):
+        if isinstance(content, basestring):
+            try:
+                ids = open(content).read()
+            except IOError:
                 ids = content
-            else:
+        else:
+            try:
+                ids = "\n".join(['"' + x + '"' for x in content])
+            except TypeError:
                 try:
-                    ids = "\n".join(map(lambda x: '"' + x + '"', iter(content)))
-                except TypeError:
-                    try:
-                        uri = content.get_list_append_uri()
-                    except:
-                        content = content.to_query()
-                        uri = content.get_list_append_uri()
-                    params = content.to_query_params()
-                    params["listName"] = name
-                    params["path"] = None
-                    form = urllib.urlencode(params)
-                    resp = self.service.opener.open(uri, form)
-                    data = resp.read()
+                    uri = content.get_list_append_uri()
+                except AttributeError:
+                    content = content.to_query()
+                    uri = content.get_list_append_uri()
+                params = content.to_query_params()
+                params["listName"] = name
+                params["path"] = None
+                form = urllib.urlencode(params)
+                resp = self.service.opener.open(uri, form)
+                data = resp.read()
+                resp.close()
 
         if data is None:
             uri = self.service.root + self.service.LIST_APPENDING_PATH
@@ -243,27 +258,27 @@ class List(object):
         "Append the arguments to this list"
         try:
             return self._do_append(self.manager.union(appendix))
-        except:
+        except Exception:
             return self._do_append(appendix)
 
     def __xor__(self, other):
         """Calculate the symmetric difference of this list and another"""
-        return self.manager.xor([self, other])
+        return self.manager.xor([self] + _as_operands(other))
 
     def __ixor__(self, other):
         """Calculate the symmetric difference of this list and another and replace this list with the result"""
-        diff = self.manager.xor([self, other], description=self.description, tags=self.tags)
+        diff = self.manager.xor([self] + _as_operands(other), description=self.description, tags=self.tags)
         self.delete()
         diff.name = self.name
         return diff
 
     def __sub__(self, other):
         """Subtract the other from this list"""
-        return self.manager.subtract([self], [other])
+        return self.manager.subtract([self], _as_operands(other))
 
     def __isub__(self, other):
         """Replace this list with the subtraction of the other from this list"""
-        subtr = self.manager.subtract([self], [other], description=self.description, tags=self.tags)
+        subtr = self.manager.subtract([self], _as_operands(other), description=self.description, tags=self.tags)
         self.delete()
         subtr.name = self.name
         return subtr
@@ -115,28 +115,28 @@ class ListManager(object):
         if name is None:
             name = self.get_unused_list_name()
 
-        try:
-            ids = open(content).read()
-        except (TypeError, IOError):
-            if isinstance(content, basestring):
+        if isinstance(content, basestring):
+            try:
+                ids = open(content).read()
+            except IOError:
                 ids = content
-            else:
+        else:
+            try:
+                ids = "\n".join(['"' + x + '"' for x in content])
+            except TypeError:
                 try:
-                    ids = "\n".join(map(lambda x: '"' + x + '"', iter(content)))
-                except TypeError:
-                    try:
-                        uri = content.get_list_upload_uri()
-                    except:
-                        content = content.to_query()
-                        uri = content.get_list_upload_uri()
-                    params = content.to_query_params()
-                    params["listName"] = name
-                    params["description"] = description
-                    form = urllib.urlencode(params)
-                    resp = self.service.opener.open(uri, form)
-                    data = resp.read()
-                    resp.close()
-                    return self.parse_list_upload_response(data) 
+                    uri = content.get_list_upload_uri()
+                except AttributeError:
+                    content = content.to_query()
+                    uri = content.get_list_upload_uri()
+                params = content.to_query_params()
+                params["listName"] = name
+                params["description"] = description
+                form = urllib.urlencode(params)
+                resp = self.service.opener.open(uri, form)
+                data = resp.read()
+                resp.close()
+                return self.parse_list_upload_response(data) 
 
         uri = self.service.root + self.service.LIST_CREATION_PATH
         query_form = {'name': name, 'type': list_type, 'description': description, 'tags': ";".join(tags)}
@@ -162,12 +162,13 @@ class ListManager(object):
 
     def delete_lists(self, lists):
         """Delete the given lists from the webserver"""
+        all_names = set(self.get_all_list_names())
         for l in lists:
             if isinstance(l, List):
                 name = l.name
             else:
                 name = str(l)
-            if name not in self.get_all_list_names():
+            if name not in all_names:
                 continue
             uri = self.service.root + self.service.LIST_PATH
             query_form = {'name': name}
@@ -1,6 +1,15 @@
-from xml.dom import minidom
+try:
+    from lxml.etree import iterparse
+except ImportError:
+    try:
+        from xml.etree.cElementTree import iterparse
+    except ImportError:
+        from xml.etree.ElementTree import iterparse
+from collections import deque
+from operator import attrgetter
 import weakref
-import re
+import os
+import threading
 
 from .util import openAnything, ReadableException
 from .lists.list import List
@@ -19,6 +28,42 @@ __organization__ = "InterMine"
 __license__ = "LGPL"
 __contact__ = "dev@intermine.org"
 
+_MODEL_CACHE = {}
+_MODEL_LOCKS = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def _model_cache_key(source):
+    """
+    Return the key to cache the model parsed from source under, or 
+    None if it should not be cached. Files are keyed by their 
+    modification time as well as their name.
+    """
+    if not isinstance(source, basestring):
+        return None
+    try:
+        return (source, os.path.getmtime(source))
+    except (OSError, TypeError, ValueError):
+        return (source, None)
+
+def clear_model_cache(source=None):
+    """
+    Forget parsed models
+    ====================
+
+    Models are only parsed once for each source, so a long running 
+    program will not notice if a webservice's model changes. Calling 
+    this makes models created afterwards read their source again.
+
+    @param source: the source to forget (default: forget all sources)
+    """
+    with _MODEL_CACHE_LOCK:
+        if source is None:
+            _MODEL_CACHE.clear()
+            _MODEL_LOCKS.clear()
+        else:
+            for key in _MODEL_CACHE.keys():
+                if key[0] == source:
+                    del _MODEL_CACHE[key]
 
 
 class Class(object):
@@ -52,6 +97,9 @@ class Class(object):
     as part of the model they belong to.
 
     """
+    __slots__ = ('name', 'parents', 'model', 'parent_classes', 'field_dict', 
+            '_field_groups', '_ancestor_names')
+
     def __init__(self, name, parents, model):
         """
         Constructor - Creates a new Class descriptor
@@ -72,6 +120,8 @@ class Class(object):
         self.model = model
         self.parent_classes = []
         self.field_dict = {}
+        self._field_groups = None
+        self._ancestor_names = None
         id = Attribute("id", "Integer", self) # All classes have the id attr
         self.field_dict["id"] = id
 
@@ -89,7 +139,7 @@ class Class(object):
 
         @rtype: list(L{Field})
         """
-        return sorted(self.field_dict.values(), key=lambda field: field.name)
+        return list((self._field_groups or self._group_fields())[0])
 
     @property
     def attributes(self):
@@ -99,7 +149,7 @@ class Class(object):
 
         @rtype: list(L{Attribute})
         """
-        return filter(lambda x: isinstance(x, Attribute), self.fields)
+        return list((self._field_groups or self._group_fields())[1])
 
     @property
     def references(self):
@@ -109,8 +159,7 @@ class Class(object):
 
         @rtype: list(L{Reference})
         """
-        def isRef(x): return isinstance(x, Reference) and not isinstance(x, Collection)
-        return filter(isRef, self.fields)
+        return list((self._field_groups or self._group_fields())[2])
 
     @property
     def collections(self):
@@ -120,7 +169,26 @@ class Class(object):
 
         @rtype: list(L{Collection})
         """
-        return filter(lambda x: isinstance(x, Collection), self.fields)
+        return list((self._field_groups or self._group_fields())[3])
+
+    def _group_fields(self):
+        """
+        Sort the fields by name, and split them into attributes, 
+        references and collections. Once the model has been vivified
+        the result is stored, since the fields will not change.
+
+        @rtype: tuple
+        """
+        fields = tuple(sorted(self.field_dict.values(), key=attrgetter('name')))
+        attributes, references, collections = [], [], []
+        for f in fields:
+            if f.is_collection:
+                collections.append(f)
+            elif f.is_reference:
+                references.append(f)
+            else:
+                attributes.append(f)
+        return (fields, tuple(attributes), tuple(references), tuple(collections))
 
     def get_field(self, name):
         """
@@ -133,10 +201,10 @@ class Class(object):
 
         @rtype: subclass of L{intermine.model.Field}
         """
-        if name in self.field_dict:
-            return self.field_dict[name]
-        else:
+        field = self.field_dict.get(name)
+        if field is None:
             raise ModelError("There is no field called %s in %s" % (name, self.name))
+        return field
 
     def isa(self, other):
         """
@@ -155,14 +223,21 @@ class Class(object):
             other_name = other.name
         else:
             other_name = other
-        if self.name == other_name:
-            return True
-        if other_name in self.parents:
-            return True
+        return other_name in (self._ancestor_names or self._get_ancestor_names())
+
+    def _get_ancestor_names(self):
+        """
+        The names of this class, its parents, and all of its ancestors' 
+        parents. This is stored once the model has been vivified.
+
+        @rtype: frozenset
+        """
+        names = set([self.name])
+        names.update(self.parents)
         for p in self.parent_classes:
-            if p.isa(other):
-                return True
-        return False
+            names.add(p.name)
+            names.update(p.parents)
+        return frozenset(names)
     
 
 class Field(object):
@@ -207,6 +282,10 @@ class Field(object):
     @see: L{Reference}
     @see: L{Collection}
     """
+    __slots__ = ('name', 'type_name', 'type_class', 'declared_in')
+    is_reference = False
+    is_collection = False
+
     def __init__(self, name, type_name, class_origin):
         """
         Constructor - DO NOT USE
@@ -240,7 +319,7 @@ class Attribute(Field):
 
     The Attribute class inherits all the behaviour of L{intermine.model.Field}
     """
-    pass
+    __slots__ = ()
 
 class Reference(Field):
     """
@@ -252,6 +331,9 @@ class Reference(Field):
     back to this one as well. And all references will have their
     type upgraded to a type_class during parsing
     """
+    __slots__ = ('reverse_reference_name', 'reverse_reference')
+    is_reference = True
+
     def __init__(self, name, type_name, class_origin, reverse_ref=None):
         """
         Constructor
@@ -289,6 +371,9 @@ class Collection(Reference):
 
     Collections have all the same behaviour and properties as References
     """
+    __slots__ = ()
+    is_collection = True
+
     def toString(self):
         """Return a string representation"""
         ret = super(Collection, self).toString().replace(" is a ", " is a group of ")
@@ -329,6 +414,8 @@ class Path(object):
     to some extent, but there are additional methods for verifying certain
     relationships as well
     """
+    __slots__ = ('model', '_string', 'parts')
+
     def __init__(self, path, model, subclasses={}):
         """
         Constructor
@@ -528,13 +615,33 @@ class Model(object):
         
         @see: L{intermine.webservice.Service}
 
+        Models are only fetched and parsed once for each source. Later 
+        models made from the same url or string build their classes 
+        from the stored result, as do models made from the same file, 
+        if it has not been modified.
+
+        @see: L{clear_model_cache}
+
         @param source: the model.xml, as a local file, string, or url
         """
         assert source is not None
         self.source = source
         self.service = weakref.proxy(service) if service is not None else service
         self.classes= {}
-        self.parse_model(source)
+        self._path_cache = {}
+        key = _model_cache_key(source)
+        if key is None:
+            parsed = _read_model(source)
+        else:
+            with _MODEL_CACHE_LOCK:
+                lock = _MODEL_LOCKS.setdefault(key, threading.Lock())
+            # Held while loading, so that services sharing a model
+            # in different threads only fetch and parse it once
+            with lock:
+                parsed = _MODEL_CACHE.get(key)
+                if parsed is None:
+                    parsed = _MODEL_CACHE[key] = _read_model(source)
+        self._build(parsed)
         self.vivify()
 
         # Make sugary aliases
@@ -552,43 +659,24 @@ class Model(object):
         @param source:  the model.xml, as a local file, string, or url
         @raise ModelParseError: if there is a problem parsing the source
         """
-        try:
-            io = openAnything(source)
-            doc = minidom.parse(io)
-            for node in doc.getElementsByTagName('model'):
-                self.name = node.getAttribute('name')
-                self.package_name = node.getAttribute('package')
-                assert node.nextSibling is None, "More than one model element"
-                assert self.name and self.package_name, "No model name or package name"
-     
-            for c in doc.getElementsByTagName('class'):
-                class_name = c.getAttribute('name')
-                assert class_name, "Name not defined in" + c.toxml()
-                def strip_java_prefix(x): 
-                    return re.sub(r'.*\.', '', x)
-                parents = map(strip_java_prefix, 
-                        c.getAttribute('extends').split(' '))
-                cl =  Class(class_name, parents, self)
-                for a in c.getElementsByTagName('attribute'):
-                    name = a.getAttribute('name')
-                    type_name = strip_java_prefix(a.getAttribute('type'))
-                    at = Attribute(name, type_name, cl)
-                    cl.field_dict[name] = at
-                for r in c.getElementsByTagName('reference'):
-                    name = r.getAttribute('name')
-                    type_name = r.getAttribute('referenced-type')
-                    linked_field_name = r.getAttribute('reverse-reference')
-                    ref = Reference(name, type_name, cl, linked_field_name)
-                    cl.field_dict[name] = ref
-                for co in c.getElementsByTagName('collection'):
-                    name = co.getAttribute('name')
-                    type_name = co.getAttribute('referenced-type')
-                    linked_field_name = co.getAttribute('reverse-reference')
-                    col = Collection(name, type_name, cl, linked_field_name)
-                    cl.field_dict[name] = col
-                self.classes[class_name] = cl
-        except Exception, error:
-            raise ModelParseError("Error parsing model", source, error)
+        self._build(_read_model(source))
+
+    def _build(self, parsed):
+        """
+        Make the classes and fields described by the result of
+        L{_read_model}. These belong to this model alone, even when 
+        the parsed description is shared with other models.
+        """
+        (self.name, self.package_name, class_specs) = parsed
+        for class_name, parents, field_specs in class_specs:
+            cl = Class(class_name, list(parents), self)
+            for field_class, name, type_name, reverse in field_specs:
+                if field_class is Attribute:
+                    field = Attribute(name, type_name, cl)
+                else:
+                    field = field_class(name, type_name, cl, reverse)
+                cl.field_dict[name] = field
+            self.classes[class_name] = cl
 
     def vivify(self):
         """
@@ -597,19 +685,26 @@ class Model(object):
         
         This method ensures the model is internally consistent. This method
         is called during instantiaton. It does not need to be called
-        directly.
-
-        @raise ModelError: if the names point to non-existent objects
+        directly. Reverse references to fields that are not in the 
+        model are left as None.
         """
-        for c in self.classes.values():
+        classes = self.classes.values()
+        own_fields = {}
+        for c in classes:
             c.parent_classes = self.to_ancestry(c)
+            own_fields[c.name] = c.field_dict.values()
+        for c in classes:
             for pc in c.parent_classes:
-                c.field_dict.update(pc.field_dict)
-            for f in c.fields:
-                f.type_class = self.classes.get(f.type_name)
-                if hasattr(f, 'reverse_reference_name') and f.reverse_reference_name != '':
-                    rrn = f.reverse_reference_name
-                    f.reverse_reference = f.type_class.field_dict[rrn]
+                c.field_dict.update((f.name, f) for f in own_fields[pc.name])
+        for fields in own_fields.values():
+            for f in fields:
+                type_class = self.classes.get(f.type_name)
+                f.type_class = type_class
+                if type_class is not None and f.is_reference and f.reverse_reference_name:
+                    f.reverse_reference = type_class.field_dict.get(f.reverse_reference_name)
+        for c in classes:
+            c._field_groups = c._group_fields()
+            c._ancestor_names = c._get_ancestor_names()
 
     def to_ancestry(self, cd):
         """
@@ -618,16 +713,24 @@ class Model(object):
         
             >>> classes = Model.to_ancestry(cd)
 
-        Returns the class' parents, and all the class' parents' parents
+        Returns the class' parents, and all the class' parents' parents.
+        Each ancestor is only listed once, nearest ancestors first.
 
         @rtype: list(L{intermine.model.Class})
         """
-        parents = cd.parents
-        def defined(x): return x is not None # weeds out the java classes
-        def to_class(x): return self.classes.get(x)
-        ancestry = filter(defined, map(to_class, parents))
-        for ancestor in ancestry:
-            ancestry.extend(self.to_ancestry(ancestor))
+        ancestry = []
+        seen = set([cd.name]) # guards against cyclical inheritance
+        queue = deque(cd.parents)
+        while queue:
+            name = queue.popleft()
+            if name in seen:
+                continue
+            seen.add(name)
+            ancestor = self.classes.get(name)
+            if ancestor is None: # weeds out the java classes
+                continue
+            ancestry.append(ancestor)
+            queue.extend(ancestor.parents)
         return ancestry
 
     def to_classes(self, classnames):
@@ -644,7 +747,7 @@ class Model(object):
 
         @rtype: list(L{intermine.model.Class})
         """
-        return map(self.get_class, classnames)
+        return [self.get_class(name) for name in classnames]
 
     def column(self, path, *rest):
         return Column(path, self, *rest)
@@ -678,10 +781,27 @@ class Model(object):
                 raise ModelError("'" + str(path) + "' is not a class")
             else:
                 return path.get_class()
-        if name in self.classes:
-          return self.classes[name]
-        else:
-          raise ModelError("'" + name + "' is not a class in this model")
+        return self.get_class_by_name(name)
+
+    def get_class_by_name(self, name):
+        """
+        Get a class by its name
+        =======================
+
+            >>> model.get_class_by_name("Gene")
+            <intermine.model.Class: Gene>
+
+        Unlike L{get_class}, this only accepts plain class names, and 
+        so it does not need to check for paths.
+
+        @raise ModelError: if there is no class with this name
+
+        @rtype: L{intermine.model.Class}
+        """
+        try:
+            return self.classes[name]
+        except KeyError:
+            raise ModelError("'" + name + "' is not a class in this model")
 
     def make_path(self, path, subclasses={}):
         """
@@ -738,32 +858,51 @@ class Model(object):
 
         This method is used when making paths from a model, and 
         when validating path strings. It probably won't need to 
-        be called directly.
+        be called directly. Since the model does not change once 
+        it has been loaded, the results are cached.
 
         @see: L{intermine.model.Model.make_path}
         @see: L{intermine.model.Model.validate_path}
         @see: L{intermine.model.Path}
         """
-        descriptors = []
-        names = path_string.split('.')
-        root_name = names.pop(0)
+        cache_key = (path_string, frozenset(subclasses.items()) if subclasses else None)
+        cached = self._path_cache.get(cache_key)
+        if cached is None:
+            cached = tuple(self._parse_path_string(path_string, subclasses))
+            self._path_cache[cache_key] = cached
+        return list(cached)
+
+    def _parse_path_string(self, path_string, subclasses):
+        root_name, dot, rest = path_string.partition('.')
+        names = rest.split('.') if dot else []
      
-        root_descriptor = self.get_class(root_name)
-        descriptors.append(root_descriptor)
+        root_descriptor = self.get_class_by_name(root_name)
+        descriptors = [root_descriptor]
+        append = descriptors.append
+        get_class = self.get_class
+        get_subclass = subclasses.get
      
-        if root_name in subclasses:
-            current_class = self.get_class(subclasses[root_name])
+        subclass = get_subclass(root_name)
+        if subclass is not None:
+            current_class = get_class(subclass)
         else:
             current_class = root_descriptor 
      
+        key = root_name
         for field_name in names:
-            field = current_class.get_field(field_name)
-            descriptors.append(field)
+            if current_class is None:
+                raise PathParseError("'" + key + "' does not refer to a class, so it has no field called " 
+                        + field_name)
+            field = current_class.field_dict.get(field_name)
+            if field is None:
+                raise ModelError("There is no field called %s in %s" % (field_name, current_class.name))
+            append(field)
+            key = key + '.' + field_name
      
-            if isinstance(field, Reference):
-                key = '.'.join(map(lambda x: x.name, descriptors))
-                if key in subclasses:
-                    current_class = self.get_class(subclasses[key])
+            if field.is_reference:
+                subclass = get_subclass(key)
+                if subclass is not None:
+                    current_class = get_class(subclass)
                 else: 
                     current_class = field.type_class
             else:
@@ -771,6 +910,64 @@ class Model(object):
      
         return descriptors 
 
+def _read_model(source):
+    """
+    Read the model.xml into a description of its classes which does
+    not refer to any model, so that it can be shared between them.
+
+    @return: (name, package name, tuple of class descriptions)
+    @raise ModelParseError: if there is a problem parsing the source
+    """
+    try:
+        io = openAnything(source)
+        root = None
+        name = package_name = None
+        classes = []
+        names = {}
+        def share(name):
+            return names.setdefault(name, name)
+        for event, elem in iterparse(io, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = elem
+            elif elem.tag == 'class':
+                classes.append(_read_class(elem, share))
+                elem.clear()
+                root.remove(elem)
+            elif elem.tag == 'model':
+                name = elem.get('name', '')
+                package_name = elem.get('package', '')
+                assert name and package_name, "No model name or package name"
+    except Exception, error:
+        raise ModelParseError("Error parsing model", source, error)
+    return (name, package_name, tuple(classes))
+
+def _read_class(elem, share):
+    """
+    Describe a class and its fields from a class element of the model.xml
+
+    Type and field names repeat throughout a model, so they are
+    passed through share to keep a single copy of each string.
+
+    @return: (name, parent names, tuple of (field class, name, type name, reverse reference))
+    """
+    class_name = share(elem.get('name', ''))
+    assert class_name, "Name not defined in class element"
+    parents = tuple([share(x.rpartition('.')[2]) for x in elem.get('extends', '').split()])
+    fields = []
+    for f in elem:
+        tag = f.tag
+        if tag == 'attribute':
+            type_name = f.get('type', '').rpartition('.')[2] # strip java packages
+            fields.append((Attribute, share(f.get('name', '')), share(type_name), None))
+        elif tag == 'reference':
+            fields.append((Reference, share(f.get('name', '')), 
+                share(f.get('referenced-type', '')), share(f.get('reverse-reference', ''))))
+        elif tag == 'collection':
+            fields.append((Collection, share(f.get('name', '')), 
+                share(f.get('referenced-type', '')), share(f.get('reverse-reference', ''))))
+    return (class_name, parents, tuple(fields))
+
 class ModelError(ReadableException):
     pass
 
@@ -1,13 +1,27 @@
 import re
+from copy import deepcopy
 
 PATTERN_STR = "^(?:\w+\.)*\w+$"
 PATH_PATTERN = re.compile(PATTERN_STR)
+_path_match = PATH_PATTERN.match
+_SLOT_NAMES = {}
+
+def _slot_names(cls):
+    """Returns the names of all the slots declared by a class and its bases"""
+    try:
+        return _SLOT_NAMES[cls]
+    except KeyError:
+        names = _SLOT_NAMES[cls] = tuple(name
+                for klass in cls.__mro__
+                for name in klass.__dict__.get('__slots__', ()))
+        return names
 
 class PathFeature(object):
+    __slots__ = ('path',)
     def __init__(self, path):
-        if not PATH_PATTERN.match(path):
+        if not _path_match(path):
             raise TypeError(
-                "Path '" + path + "' does not match expected pattern" + PATTERN_STR)
+                "Path '" + path + "' does not match expected pattern " + PATTERN_STR)
         self.path = path
     def __repr__(self):
         return "<" + self.__class__.__name__ + ": " + self.to_string() + ">"
@@ -15,11 +29,64 @@ class PathFeature(object):
         return str(self.path)
     def to_dict(self):
         return { 'path' : self.path }
+    def clone(self):
+        """
+        Returns a shallow copy of this feature, made without going
+        through the constructor (and so without re-validating it).
+        """
+        cls = self.__class__
+        clone = cls.__new__(cls)
+        for name in _slot_names(cls):
+            try:
+                object.__setattr__(clone, name, getattr(self, name))
+            except AttributeError:
+                pass
+        state = getattr(self, '__dict__', None)
+        if state:
+            clone.__dict__.update(state)
+        return clone
+    def __getstate__(self):
+        """
+        Returns the state to pickle: the values of the slots, along 
+        with the instance dictionary of subclasses that have one.
+        """
+        slots = {}
+        for name in _slot_names(self.__class__):
+            try:
+                slots[name] = getattr(self, name)
+            except AttributeError:
+                pass
+        return (getattr(self, '__dict__', None), slots)
+    def __setstate__(self, state):
+        instance_state, slots = state
+        if instance_state:
+            self.__dict__.update(instance_state)
+        for name, value in slots.iteritems():
+            object.__setattr__(self, name, value)
+    def __copy__(self):
+        return self.clone()
+    def __deepcopy__(self, memo):
+        cls = self.__class__
+        clone = cls.__new__(cls)
+        memo[id(self)] = clone
+        for name in _slot_names(cls):
+            try:
+                value = getattr(self, name)
+            except AttributeError:
+                continue
+            object.__setattr__(clone, name, deepcopy(value, memo))
+        state = getattr(self, '__dict__', None)
+        if state:
+            clone_state = clone.__dict__
+            for name, value in state.iteritems():
+                clone_state[name] = deepcopy(value, memo)
+        return clone
     @property
     def child_type(self):
         raise AttributeError()
 
 class Join(PathFeature):
+    __slots__ = ('style',)
     valid_join_styles = ['OUTER', 'INNER']
     INNER = "INNER"
     OUTER = "OUTER"
@@ -38,6 +105,7 @@ class Join(PathFeature):
                 + ' '.join([':', self.path, self.style]) + '>')
 
 class PathDescription(PathFeature):
+    __slots__ = ('description',)
     child_type = 'pathDescription'
     def __init__(self, path, description):
         self.description = description
@@ -48,6 +116,7 @@ class PathDescription(PathFeature):
         return d
 
 class SortOrder(PathFeature):
+    __slots__ = ('order',)
     ASC = "asc"
     DESC = "desc"
     DIRECTIONS = frozenset(["asc", "desc"])
@@ -81,6 +150,12 @@ class SortOrderList(object):
         return ",".join(map(str, self.sort_orders))
     def clear(self):
         self.sort_orders = []
+    def clone(self):
+        clone = SortOrderList()
+        clone.sort_orders = [so.clone() for so in self.sort_orders]
+        return clone
+    def __copy__(self):
+        return self.clone()
     def is_empty(self):
         return len(self.sort_orders) == 0
     def next(self):
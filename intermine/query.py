@@ -1,6 +1,14 @@
 import re
-from copy import deepcopy
-from xml.dom import minidom, getDOMImplementation
+from operator import add
+from xml.dom import minidom
+from xml.sax.saxutils import escape
+try:
+    from lxml import etree
+except ImportError:
+    try:
+        from xml.etree import cElementTree as etree
+    except ImportError:
+        from xml.etree import ElementTree as etree
 
 from .util import openAnything, ReadableException
 from .pathfeatures import PathDescription, Join, SortOrder, SortOrderList
@@ -20,6 +28,64 @@ __organization__ = "InterMine"
 __license__ = "LGPL"
 __contact__ = "dev@intermine.org"
 
+_XML_ENTITIES = {'"': "&quot;"}
+_VIEW_SPLIT_RE = re.compile(r"(?:,?\s+|,)")
+_setattr = object.__setattr__
+_PARAM_NAMES = {'extraValue': 'extra', 'path': 'constraint'}
+_CONSTRAINT_ATTRIBUTES = (
+    ('op', 'op'), ('value', 'value'), ('code', 'code'),
+    ('subclass', 'type'), ('editable', 'editable'),
+    ('optional', 'switchable'), ('extra_value', 'extraValue'),
+    ('loopPath', 'loopPath'))
+
+def _iter_open_tag(tag, attributes):
+    """
+    Yields the start of an element as xml fragments
+
+    Attributes are written in sorted order, and values escaped
+    in the same way as minidom, so the output is the same as the
+    DOM based serialisation used to produce. The tag is left
+    open, for the caller to close with either '/>' or '>'.
+    """
+    yield '<' + tag
+    for name, value in sorted(attributes):
+        yield ' ' + name + '="' + escape(value, _XML_ENTITIES) + '"'
+
+def _iter_child_xml(child):
+    """Yields a query child (join, constraint...) as xml fragments"""
+    attributes = []
+    subelements = []
+    for name, value in child.to_dict().items():
+        if isinstance(value, (set, list)):
+            subelements.extend((name, v) for v in value)
+        else:
+            attributes.append((name, value))
+    tag = child.child_type
+    for part in _iter_open_tag(tag, attributes):
+        yield part
+    if subelements:
+        yield '>'
+        for name, text in subelements:
+            yield '<' + name + '>' + escape(text, _XML_ENTITIES) + '</' + name + '>'
+        yield '</' + tag + '>'
+    else:
+        yield '/>'
+
+def _by_code(con):
+    """Sort key putting codes in the order they are handed out: A-Z, then AA-ZZ"""
+    code = con.code
+    return (len(code), code)
+
+def _read_count(rows):
+    """Read the number of rows from the results of a count request"""
+    count_str = ""
+    for row in rows:
+        count_str += row
+    try:
+        return int(count_str)
+    except ValueError:
+        raise WebserviceError("Server returned a non-integer count: " + count_str)
+
 
 class Query(object):
     """
@@ -274,6 +340,13 @@ class Query(object):
         +==============================================
 
     """
+    __slots__ = ('model', 'root', 'name', 'description', 'service',
+            'do_verification', 'path_descriptions', 'joins', 'constraint_dict',
+            'uncoded_constraints', 'views', '_sort_order_list', '_logic_parser',
+            '_logic', 'constraint_factory', '_xml_cache', '_subclass_dict',
+            '_path_cache', '_coded_cache', '_default_logic')
+    _CACHES = ('_xml_cache', '_subclass_dict', '_path_cache', '_coded_cache')
+
     def __init__(self, model, service=None, validate=True, root=None):
         """
         Construct a new Query
@@ -294,6 +367,11 @@ class Query(object):
             will not try and validate itself. You should not set this to false.
 
         """
+        self._xml_cache = None
+        self._subclass_dict = None
+        self._path_cache = None
+        self._coded_cache = None
+        self._default_logic = None
         self.model = model
         if root is None:
             self.root = root
@@ -314,16 +392,11 @@ class Query(object):
         self._logic = None
         self.constraint_factory = constraints.ConstraintFactory()
 
-        # Set up sugary aliases
-        self.c = self.column
-        self.filter = self.where
-        self.add_column = self.add_view
-        self.add_columns = self.add_view
-        self.add_views = self.add_view
-        self.select = self.add_view
-        self.order_by = self.add_sort_order
-        self.all = self.get_results_list
-        self.rows = self.results
+    def __setattr__(self, name, value):
+        if not name.startswith('_'):
+            for cache in self._CACHES:
+                _setattr(self, cache, None)
+        _setattr(self, name, value)
 
     def __iter__(self):
         return self.results("jsonobjects")
@@ -350,48 +423,41 @@ class Query(object):
         obj = cls(*args, **kwargs)
         obj.do_verification = False
         f = openAnything(xml)
-        doc = minidom.parse(f)
-        f.close()
+        try:
+            root = etree.parse(f).getroot()
+        except Exception, error:
+            raise QueryParseError("Error parsing query xml", error)
+        finally:
+            f.close()
 
-        queries = doc.getElementsByTagName('query')
+        queries = list(root.iter('query'))
         assert len(queries) == 1, "wrong number of queries in xml"
         q = queries[0]
-        obj.name = q.getAttribute('name')
-        obj.description = q.getAttribute('description')
-        obj.add_view(q.getAttribute('view'))
-        for p in q.getElementsByTagName('pathDescription'):
-            path = p.getAttribute('pathString')
-            description = p.getAttribute('description')
-            obj.add_path_description(path, description)
-        for j in q.getElementsByTagName('join'):
-            path = j.getAttribute('path')
-            style = j.getAttribute('style')
-            obj.add_join(path, style)
-        for c in q.getElementsByTagName('constraint'):
-            args = {}
-            args['path'] = c.getAttribute('path')
-            if args['path'] is None:
-                if c.parentNode.tagName != "node":
+        obj.name = q.get('name', '')
+        obj.description = q.get('description', '')
+        obj.add_view(q.get('view', ''))
+        for p in q.iter('pathDescription'):
+            obj.add_path_description(p.get('pathString', ''), p.get('description', ''))
+        for j in q.iter('join'):
+            obj.add_join(j.get('path', ''), j.get('style', ''))
+        parents = None
+        for c in q.iter('constraint'):
+            path = c.get('path')
+            if path is None:
+                if parents is None:
+                    parents = dict((child, parent) for parent in q.iter() for child in parent)
+                parent = parents.get(c)
+                if parent is None or parent.tag != "node":
                     msg = "Constraints must have a path"
                     raise QueryParseError(msg)
-                args['path'] = c.parentNode.getAttribute('path')
-            args['op'] = c.getAttribute('op')
-            args['value'] = c.getAttribute('value')
-            args['code'] = c.getAttribute('code')
-            args['subclass'] = c.getAttribute('type')
-            args['editable'] = c.getAttribute('editable')
-            args['optional'] = c.getAttribute('switchable')
-            args['extra_value'] = c.getAttribute('extraValue')
-            args['loopPath'] = c.getAttribute('loopPath')
-            values = []
-            for val_e in c.getElementsByTagName('value'):
-                texts = []
-                for node in val_e.childNodes:
-                    if node.nodeType == node.TEXT_NODE: texts.append(node.data)
-                values.append(' '.join(texts))
-            if len(values) > 0: args["values"] = values
-            for k, v in args.items():
-                if v is None or v == '': del args[k]
+                path = parent.get('path')
+            args = {}
+            if path: args['path'] = path
+            for name, attr in _CONSTRAINT_ATTRIBUTES:
+                value = c.get(attr)
+                if value: args[name] = value
+            values = [unicode(val_e.text or '') for val_e in c.iter('value')]
+            if values: args["values"] = values
             if "loopPath" in args:
                 args["op"] = {
                     "=" : "IS",
@@ -399,7 +465,7 @@ class Query(object):
                 }.get(args["op"])
             con = obj.add_constraint(**args)
             if not con:
-                raise ConstraintError("error adding constraint with args: " + args)
+                raise ConstraintError("error adding constraint with args: " + str(args))
         obj.verify()        
 
         return obj
@@ -463,16 +529,18 @@ class Query(object):
                     views.append(str(p))
                 else:
                     views.append(str(p) + ".*")
+            elif ',' not in p and p.split(None, 1) == [p]:
+                views.append(p)
             else:
-                views.extend(re.split("(?:,?\s+|,)", p))
+                views.extend(_VIEW_SPLIT_RE.split(p))
 
         views = map(self.prefix_path, views)
 
         views_to_add = []
         for view in views:
             if view.endswith(".*"):
-                view = re.sub("\.\*$", "", view)
-                path = self.model.make_path(view, self.get_subclass_dict())
+                view = view[:-2]
+                path = self._make_path(view)
                 cd = path.end_class
                 attr_views = map(lambda x: view + "." + x.name, cd.attributes)
                 views_to_add.extend(attr_views)
@@ -488,7 +556,7 @@ class Query(object):
     
     def prefix_path(self, path):
         if self.root is None:
-            self.root = self.model.make_path(path, self.get_subclass_dict()).root
+            self.root = self._make_path(path).root
             return path
         else:
             if path.startswith(self.root.name):
@@ -521,7 +589,7 @@ class Query(object):
         """
         if views is None: views = self.views
         for path in views:
-            path = self.model.make_path(path, self.get_subclass_dict())
+            path = self._make_path(path)
             if not path.is_attribute():
                 raise ConstraintError("'" + str(path) 
                         + "' does not represent an attribute")
@@ -563,6 +631,7 @@ class Query(object):
         if self.do_verification: self.verify_constraint_paths([con])
         if hasattr(con, "code"): 
             self.constraint_dict[con.code] = con
+            self._coded_cache = None
         else:
             self.uncoded_constraints.append(con)
         
@@ -604,9 +673,9 @@ class Query(object):
         @raise ConstraintError: if the constraints do not satisfy the above rules
 
         """
-        if cons is None: cons = self.constraints
+        if cons is None: cons = self.constraint_dict.values() + self.uncoded_constraints
         for con in cons:
-            pathA = self.model.make_path(con.path, self.get_subclass_dict())
+            pathA = self._make_path(con.path)
             if isinstance(con, constraints.TernaryConstraint):
                 if pathA.get_class() is None:
                     raise ConstraintError("'" + str(pathA) + "' does not represent a class, or a reference to a class")
@@ -614,11 +683,11 @@ class Query(object):
                 if not pathA.is_attribute():
                     raise ConstraintError("'" + str(pathA) + "' does not represent an attribute")
             elif isinstance(con, constraints.SubClassConstraint):
-                pathB = self.model.make_path(con.subclass, self.get_subclass_dict())
+                pathB = self._make_path(con.subclass)
                 if not pathB.get_class().isa(pathA.get_class()):
                     raise ConstraintError("'" + con.subclass + "' is not a subclass of '" + con.path + "'")
             elif isinstance(con, constraints.LoopConstraint):
-                pathB = self.model.make_path(con.loopPath, self.get_subclass_dict())
+                pathB = self._make_path(con.loopPath)
                 for path in [pathA, pathB]:
                     if not path.get_class():
                         raise ConstraintError("'" + str(path) + "' does not refer to an object")
@@ -643,7 +712,7 @@ class Query(object):
 
         @rtype: list(Constraint)
         """
-        ret = sorted(self.constraint_dict.values(), key=lambda con: con.code)
+        ret = list(self._sorted_coded_constraints())
         ret.extend(self.uncoded_constraints)
         return ret
 
@@ -728,7 +797,7 @@ class Query(object):
         """
         if joins is None: joins = self.joins
         for join in joins:
-            path = self.model.make_path(join.path, self.get_subclass_dict())
+            path = self._make_path(join.path)
             if not path.is_reference():
                 raise QueryError("'" + join.path + "' is not a reference")
 
@@ -765,8 +834,9 @@ class Query(object):
         @raise ModelError: if the paths are invalid
         """
         if pds is None: pds = self.path_descriptions
+        subclasses = self.get_subclass_dict()
         for pd in pds: 
-            self.model.validate_path(pd.path, self.get_subclass_dict())
+            self.model.validate_path(pd.path, subclasses)
 
     @property
     def coded_constraints(self):
@@ -782,7 +852,16 @@ class Query(object):
 
         @rtype: list(L{intermine.constraints.CodedConstraint})
         """
-        return sorted(self.constraint_dict.values(), key=lambda con: con.code)
+        return list(self._sorted_coded_constraints())
+
+    def _sorted_coded_constraints(self):
+        """
+        Return the coded constraints sorted by code, as a tuple
+        which is cached until a coded constraint is added.
+        """
+        if self._coded_cache is None:
+            self._coded_cache = tuple(sorted(self.constraint_dict.values(), key=_by_code))
+        return self._coded_cache
 
     def get_logic(self):
         """
@@ -795,10 +874,27 @@ class Query(object):
         The LogicGroup object stringifies to a string that can be parsed to 
         obtain itself (eg: "A and (B or C or D)").
 
+        The default logic is built once for each set of coded constraints,
+        and a copy of it is returned, so that it can be combined with
+        other logic freely.
+
         @rtype: L{intermine.constraints.LogicGroup}
         """
+        logic = self._get_logic()
+        if self._logic is None and isinstance(logic, constraints.LogicGroup):
+            return logic.clone(self.constraint_dict)
+        return logic
+
+    def _get_logic(self):
+        """
+        Returns the logic expression for the query, without copying the default logic.
+        """
         if self._logic is None:
-            return reduce(lambda x, y: x+y, self.coded_constraints)
+            cons = self._sorted_coded_constraints()
+            default = self._default_logic
+            if default is None or default[0] is not cons:
+                default = self._default_logic = (cons, reduce(add, cons))
+            return default[1]
         else:
             return self._logic
 
@@ -839,11 +935,11 @@ class Query(object):
         @raise QueryError: if not every coded constraint is represented
         """
         if logic is None: logic = self._logic
-        logic_codes = set(logic.get_codes())
-        for con in self.coded_constraints:
-            if con.code not in logic_codes:
-                raise QueryError("Constraint " + con.code + repr(con) 
-                        + " is not mentioned in the logic: " + str(logic))
+        missing = set(self.constraint_dict).difference(logic.get_codes())
+        if missing:
+            con = self.constraint_dict[min(missing)]
+            raise QueryError("Constraint " + con.code + repr(con) 
+                    + " is not mentioned in the logic: " + str(logic))
 
     def get_default_sort_order(self):
         """
@@ -924,8 +1020,9 @@ class Query(object):
         if not so_elems:
             so_elems = self._sort_order_list
         
+        subclasses = self.get_subclass_dict()
         for so in so_elems:
-            self.model.validate_path(so.path, self.get_subclass_dict())
+            self.model.validate_path(so.path, subclasses)
             if so.path not in self.views:
                 raise QueryError("Sort order element is not in the view: " + so.path)
 
@@ -946,13 +1043,36 @@ class Query(object):
 
         Users most likely will not need to ever call this method.
 
+        The mapping is cached until the subclass constraints change, 
+        so it should not be modified.
+
         @rtype: dict(string, string)
         """
-        subclass_dict = {}
-        for c in self.constraints:
-            if isinstance(c, constraints.SubClassConstraint):
-                subclass_dict[c.path] = c.subclass
-        return subclass_dict
+        state = tuple([(c.path, c.subclass) for c in self.uncoded_constraints])
+        cached = self._subclass_dict
+        if cached is None or cached[0] != state:
+            subclass_dict = {}
+            for c in self.uncoded_constraints:
+                if isinstance(c, constraints.SubClassConstraint):
+                    subclass_dict[c.path] = c.subclass
+            cached = self._subclass_dict = (state, subclass_dict)
+        return cached[1]
+
+    def _make_path(self, path):
+        """
+        Return the Path for a path string, in the context of this query's subclasses.
+        Paths are cached until the subclass dict changes.
+        """
+        subclasses = self.get_subclass_dict()
+        cached = self._path_cache
+        if cached is None or cached[0] is not subclasses:
+            cached = self._path_cache = (subclasses, {})
+        cache = cached[1]
+        try:
+            return cache[path]
+        except KeyError:
+            made = cache[path] = self.model.make_path(path, subclasses)
+            return made
 
     def results(self, row="rr", start=0, size=None):
         """
@@ -972,8 +1092,11 @@ class Query(object):
 
         @raise WebserviceError: if the request is unsuccessful
         """
+        return self._get_results(self.to_query_params(), row, start, size)
+
+    def _get_results(self, params, row, start, size):
+        """Request the results of this query with the given parameters"""
         path = self.get_results_path()
-        params = self.to_query_params()
         params["start"] = start
         if size:
             params["size"] = size
@@ -1035,14 +1158,7 @@ class Query(object):
         @rtype: int
         @raise WebserviceError: if the request is unsuccessful.
         """
-        count_str = ""
-        rows = self.results("count")
-        for row in rows:
-            count_str += row
-        try:
-            return int(count_str)
-        except ValueError:
-            raise WebserviceError("Server returned a non-integer count: " + count_str)
+        return _read_count(self.results("count"))
 
     def get_list_upload_uri(self):
         """
@@ -1104,7 +1220,9 @@ class Query(object):
         @return: the child element of this query
         @rtype: list
         """
-        return sum([self.path_descriptions, self.joins, self.constraints], [])
+        children = self.path_descriptions + self.joins
+        children.extend(self.constraints)
+        return children
         
     def to_query_params(self):
         """
@@ -1127,37 +1245,15 @@ class Query(object):
         Returns a DOM node representing the query
         =========================================
 
-        This is an intermediate step in the creation of the 
-        xml serialised version of the query. You probably 
-        won't need to call this directly.
+        The node is built by parsing the output of L{to_xml},
+        for callers that want to manipulate the query as a DOM.
 
         @rtype: xml.minidom.Node
         """
-        impl  = getDOMImplementation()
-        doc   = impl.createDocument(None, "query", None)
-        query = doc.documentElement
-        
-        query.setAttribute('name', self.name)
-        query.setAttribute('model', self.model.name)
-        query.setAttribute('view', ' '.join(self.views))
-        query.setAttribute('sortOrder', str(self.get_sort_order()))
-        query.setAttribute('longDescription', self.description)
-        if len(self.coded_constraints) > 1:
-            query.setAttribute('constraintLogic', str(self.get_logic()))
-
-        for c in self.children():
-            element = doc.createElement(c.child_type)
-            for name, value in c.to_dict().items():
-                if isinstance(value, (set, list)):
-                    for v in value:
-                        subelement = doc.createElement(name)
-                        text = doc.createTextNode(v)
-                        subelement.appendChild(text)
-                        element.appendChild(subelement)
-                else:
-                    element.setAttribute(name, value)
-            query.appendChild(element)
-        return query
+        xml = self.to_xml()
+        if isinstance(xml, unicode):
+            xml = xml.encode('utf-8')
+        return minidom.parseString(xml).documentElement
 
     def to_xml(self):
         """
@@ -1168,11 +1264,69 @@ class Query(object):
         xml string, suitable for storing, or sending over the 
         internet to the webservice.
 
+        The serialisation is cached, and reused for as long as
+        everything it is built from is unchanged, however the
+        query (or its views, joins and constraints) was altered.
+
         @return: the serialised xml string
         @rtype: string
         """
-        n = self.to_Node()
-        return n.toxml()
+        state = self._xml_state()
+        cached = self._xml_cache
+        if cached is None or cached[0] != state:
+            cached = self._xml_cache = (state, ''.join(self.iter_xml()))
+        return cached[1]
+
+    def _xml_state(self):
+        """
+        Everything the XML serialisation is built from, for checking
+        whether a cached serialisation is still current.
+
+        @rtype: tuple
+        """
+        return (self.name, self.description, self.model, tuple(self.views),
+                tuple([(so.path, so.order) for so in self._sort_order_list]),
+                tuple([(j.path, j.style) for j in self.joins]),
+                tuple([(pd.path, pd.description) for pd in self.path_descriptions]),
+                tuple([(c.path, c.subclass) for c in self.uncoded_constraints]),
+                tuple([c.to_dict() for c in self.constraint_dict.values()]),
+                self._logic)
+
+    def iter_xml(self):
+        """
+        Return the XML serialisation of the query in fragments
+        ======================================================
+
+        Query.iter_xml() S{->} iterator(string)
+
+        This yields the same serialisation as L{to_xml}, piece
+        by piece, for writing a query out without holding 
+        the whole string in memory. It is never cached.
+
+        @rtype: iterator
+        """
+        attributes = [
+            ('name', self.name),
+            ('model', self.model.name),
+            ('view', ' '.join(self.views)),
+            ('sortOrder', str(self.get_sort_order())),
+            ('longDescription', self.description)
+        ]
+        if len(self.constraint_dict) > 1:
+            attributes.append(('constraintLogic', str(self._get_logic())))
+
+        for part in _iter_open_tag('query', attributes):
+            yield part
+        children = self.children()
+        if children:
+            yield '>'
+            for c in children:
+                for part in _iter_child_xml(c):
+                    yield part
+            yield '</query>'
+        else:
+            yield '/>'
+
     def to_formatted_xml(self):
         """
         Return a readable XML serialisation of the query
@@ -1203,14 +1357,44 @@ class Query(object):
 
         @return: same class as caller
         """
-        newobj = self.__class__(self.model)
-        for attr in ["joins", "views", "_sort_order_list", "_logic", "path_descriptions", "constraint_dict"]:
-            setattr(newobj, attr, deepcopy(getattr(self, attr)))
-
-        for attr in ["name", "description", "service", "do_verification", "constraint_factory", "root"]:
-            setattr(newobj, attr, getattr(self, attr))
+        cls = self.__class__
+        newobj = cls.__new__(cls)
+        # Filled in directly: the constructor's defaults would all be
+        # replaced, and __setattr__ would reset the caches every time.
+        for attr in self._CACHES:
+            _setattr(newobj, attr, None)
+        _setattr(newobj, '_default_logic', None)
+        for attr in ("model", "root", "name", "description", "service",
+                "do_verification", "constraint_factory"):
+            _setattr(newobj, attr, getattr(self, attr))
+        # Subclass constraints are not carried over, as before
+        _setattr(newobj, 'uncoded_constraints', [])
+        _setattr(newobj, '_logic_parser', constraints.LogicParser(newobj))
+        _setattr(newobj, 'views', list(self.views))
+        _setattr(newobj, 'joins', [j.clone() for j in self.joins])
+        _setattr(newobj, 'path_descriptions', [pd.clone() for pd in self.path_descriptions])
+        _setattr(newobj, '_sort_order_list', self._sort_order_list.clone())
+        cons = dict((code, con.clone()) for code, con in self.constraint_dict.iteritems())
+        _setattr(newobj, 'constraint_dict', cons)
+        logic = self._logic
+        if isinstance(logic, constraints.LogicGroup):
+            logic = logic.clone(cons)
+        elif logic is not None:
+            logic = cons.get(logic.code, logic)
+        _setattr(newobj, '_logic', logic)
         return newobj
 
+    # Sugary aliases
+    c = column
+    filter = where
+    add_column = add_view
+    add_columns = add_view
+    add_views = add_view
+    select = add_view
+    order_by = add_sort_order
+    all = get_results_list
+    rows = results
+
 class Template(Query):
     """
     A Class representing a predefined query
@@ -1250,6 +1434,8 @@ class Template(Query):
     @see: L{Template.results}
 
     """
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         """
         Constructor
@@ -1277,8 +1463,7 @@ class Template(Query):
         interesting. This property returns this subset of constraints
         that have the editable flag set to true.
         """
-        isEditable = lambda x: x.editable
-        return filter(isEditable, self.constraints)
+        return [c for c in self.constraints if c.editable]
 
     def to_query_params(self):
         """
@@ -1301,17 +1486,54 @@ class Template(Query):
         
         @rtype: dict
         """
+        return self._make_params(self.editable_constraints)
+
+    def _make_params(self, cons, con_values=None):
+        """
+        Build the template request parameters for the given constraints,
+        with the values in con_values (keyed by code) applied to copies of
+        the constraints they refer to, leaving the template itself unchanged.
+        Switched off constraints are left out.
+
+        @raise ConstraintError: if the constraint values specify an operator the constraint does not accept.
+        """
         p = {'name' : self.name}
         i = 1
-        for c in self.editable_constraints:
-            if not c.switched_on: next
+        for c in cons:
+            if not c.switched_on:
+                continue
+            options = con_values and con_values.get(getattr(c, 'code', None))
+            if options:
+                op = options.get('op')
+                if op is not None and op not in c.OPS:
+                    raise ConstraintError("'" + op + "' is not a valid operator for the constraint '"
+                                           + c.code + "' on this query")
+                c = c.clone()
+                for key, value in options.items():
+                    setattr(c, key, value)
+            suffix = str(i)
             for k, v in c.to_dict().items():
-                k = "extra" if k == "extraValue" else k
-                k = "constraint" if k == "path" else k
-                p[k + str(i)] = v
+                p[_PARAM_NAMES.get(k, k) + suffix] = v
             i += 1
         return p
 
+    def _get_adjusted_params(self, con_values):
+        """
+        Get the request parameters for a run of this template
+        =====================================================
+
+        This has the same effect as calling to_query_params on the
+        result of get_adjusted_template, without cloning the template.
+
+        @raise ConstraintError: if the constraint values specify values for a non-editable constraint.
+        """
+        for code in con_values:
+            if not self.get_constraint(code).editable:
+                raise ConstraintError("There is a constraint '" + code 
+                                       + "' on this query, but it is not editable")
+        cons = [c for c in self._sorted_coded_constraints() if c.editable]
+        return self._make_params(cons, con_values)
+
     def get_results_path(self):
         """
         Returns the path section pointing to the REST resource
@@ -1383,8 +1605,8 @@ class Template(Query):
 
         @rtype: L{intermine.webservice.ResultIterator}
         """
-        clone = self.get_adjusted_template(con_values)
-        return super(Template, clone).results(row, start, size)
+        params = self._get_adjusted_params(con_values)
+        return self._get_results(params, row, start, size)
 
     def get_results_list(self, row="rr", start=0, size=None, **con_values):
         """
@@ -1401,8 +1623,8 @@ class Template(Query):
         @rtype: list
 
         """
-        clone = self.get_adjusted_template(con_values)
-        return super(Template, clone).get_results_list(row, start, size)
+        rows = self.results(row, start, size, **con_values)
+        return [r for r in rows]
 
     def count(self, **con_values):
         """
@@ -1418,8 +1640,10 @@ class Template(Query):
         @rtype: int
         @raise WebserviceError: if the request is unsuccessful.
         """
-        clone = self.get_adjusted_template(con_values)
-        return super(Template, clone).count()
+        return _read_count(self.results("count", **con_values))
+
+    all = get_results_list
+    rows = results
 
 
 class QueryError(ReadableException):
@@ -1,11 +1,18 @@
 from urlparse import urlunsplit, urljoin
-from xml.dom import minidom
+try:
+    from lxml.etree import iterparse, tostring
+except ImportError:
+    try:
+        from xml.etree.cElementTree import iterparse, tostring
+    except ImportError:
+        from xml.etree.ElementTree import iterparse, tostring
 import urllib
 from urlparse import urlparse
 import csv
 import base64
 import httplib
 import re
+import zlib
 
 # Use core json for 2.6+, simplejson for <=2.5
 try:
@@ -313,15 +320,27 @@ class Service(object):
         """
         if self._templates is None:
             sock = self.opener.open(self.root + self.TEMPLATES_PATH)
-            dom = minidom.parse(sock)
-            sock.close()
             templates = {}
-            for e in dom.getElementsByTagName('template'):
-                name = e.getAttribute('name')
-                if name in templates:
-                    raise ServiceError("Two templates with same name: " + name)
-                else:
-                    templates[name] = e.toxml()
+            open_elements = []
+            try:
+                for event, e in iterparse(sock, events=('start', 'end')):
+                    if event == 'start':
+                        open_elements.append(e)
+                        continue
+                    open_elements.pop()
+                    if e.tag != 'template':
+                        continue
+                    name = e.get('name', '')
+                    if name in templates:
+                        raise ServiceError("Two templates with same name: " + name)
+                    else:
+                        templates[name] = tostring(e)
+                    # Drop the finished template from the tree entirely
+                    e.clear()
+                    if open_elements:
+                        open_elements[-1].remove(e)
+            finally:
+                sock.close()
             self._templates = templates
         return self._templates
 
@@ -820,6 +839,83 @@ class ResultObjParser(Parser):
         ro = ResultObject(row, self.cld)
         return ro
 
+def _read_content(fp, headers):
+    """Read the whole of a response body, inflating it if it was gzipped"""
+    content = fp.read()
+    if headers is not None and headers.get('Content-Encoding') == 'gzip':
+        try:
+            content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+        except zlib.error:
+            pass
+    return content
+
+class _InflatingResponse(object):
+    """
+    A gzip encoded response, inflated as it is read
+    ===============================================
+
+    Supports reading and line iteration like the
+    file objects urllib returns. gzip.GzipFile cannot
+    be used, as it needs to seek in the underlying file.
+    """
+    CHUNK_SIZE = 16384
+
+    def __init__(self, fp):
+        self.fp = fp
+        self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._buffer = ''
+        self._eof = False
+
+    def _fill(self):
+        chunk = self.fp.read(self.CHUNK_SIZE)
+        if chunk:
+            self._buffer += self._inflater.decompress(chunk)
+        else:
+            self._buffer += self._inflater.flush()
+            self._eof = True
+
+    def read(self, size=-1):
+        if size < 0:
+            parts = [self._buffer]
+            while not self._eof:
+                self._buffer = ''
+                self._fill()
+                parts.append(self._buffer)
+            self._buffer = ''
+            return ''.join(parts)
+        while len(self._buffer) < size and not self._eof:
+            self._fill()
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readline(self):
+        end = self._buffer.find('\n')
+        while end < 0 and not self._eof:
+            start = len(self._buffer)
+            self._fill()
+            end = self._buffer.find('\n', start)
+        end = len(self._buffer) if end < 0 else end + 1
+        line, self._buffer = self._buffer[:end], self._buffer[end:]
+        return line
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def info(self):
+        return self.fp.info()
+
+    def geturl(self):
+        return self.fp.geturl()
+
+    def close(self):
+        self.fp.close()
+
 class InterMineURLOpener(urllib.FancyURLopener):
     """
     Specific implementation of urllib.FancyURLOpener for this client
@@ -839,6 +935,7 @@ class InterMineURLOpener(urllib.FancyURLopener):
         Return a new url-opener with the appropriate credentials
         """
         urllib.FancyURLopener.__init__(self)
+        self.addheader("Accept-Encoding", "gzip")
         self.token = token
         self.plain_post_header = {
             "Content-Type": "text/plain; charset=utf-8",
@@ -866,7 +963,12 @@ class InterMineURLOpener(urllib.FancyURLopener):
 
     def open(self, url, data=None):
         url = self.prepare_url(url)
-        return urllib.FancyURLopener.open(self, url, data) 
+        resp = urllib.FancyURLopener.open(self, url, data)
+        # Redirects are followed through this method, so may already be wrapped
+        if (not isinstance(resp, _InflatingResponse) 
+                and resp.info().get('Content-Encoding') == 'gzip'):
+            return _InflatingResponse(resp)
+        return resp
 
     def prepare_url(self, url):
         if self.token:
@@ -893,7 +995,7 @@ class InterMineURLOpener(urllib.FancyURLopener):
 
     def http_error_default(self, url, fp, errcode, errmsg, headers):
         """Re-implementation of http_error_default, with content now supplied by default"""
-        content = fp.read()
+        content = _read_content(fp, headers)
         fp.close()
         raise WebserviceError(errcode, errmsg, content)
 
@@ -907,7 +1009,7 @@ class InterMineURLOpener(urllib.FancyURLopener):
         @raise WebserviceError: in all circumstances
 
         """
-        content = fp.read()
+        content = _read_content(fp, headers)
         fp.close()
         raise WebserviceError("There was a problem with our request", errcode, errmsg, content)
 
@@ -922,7 +1024,7 @@ class InterMineURLOpener(urllib.FancyURLopener):
         @raise WebserviceError: in all circumstances
 
         """
-        content = fp.read()
+        content = _read_content(fp, headers)
         fp.close()
         if self.using_authentication:
             raise WebserviceError("Insufficient permissions", errcode, errmsg, content)
@@ -940,7 +1042,7 @@ class InterMineURLOpener(urllib.FancyURLopener):
         @raise WebserviceError: in all circumstances
 
         """
-        content = fp.read()
+        content = _read_content(fp, headers)
         fp.close()
         raise WebserviceError("Missing resource", errcode, errmsg, content)
     def http_error_500(self, url, fp, errcode, errmsg, headers, data=None):
@@ -954,7 +1056,7 @@ class InterMineURLOpener(urllib.FancyURLopener):
         @raise WebserviceError: in all circumstances
 
         """
-        content = fp.read()
+        content = _read_content(fp, headers)
         fp.close()
         raise WebserviceError("Internal server error", errcode, errmsg, content)
 
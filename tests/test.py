@@ -1,4 +1,5 @@
 import time
+import pickle
 import unittest
 
 from intermine.model import *
@@ -40,6 +41,19 @@ class TestModel(WebserviceTest):
         if self.model is None: 
             self.__class__.model = Model(self.get_test_root() + "/model")
 
+    def testModelCaching(self):
+        """Models from the same source should each have their own classes"""
+        source = self.get_test_root() + "/model"
+        other = Model(source)
+        self.assertEqual(other.name, self.model.name)
+        self.assertEqual(sorted(other.classes), sorted(self.model.classes))
+        emp = other.get_class("Employee")
+        self.assertTrue(emp is not self.model.get_class("Employee"))
+        self.assertTrue(emp.model is other)
+        self.assertTrue(emp.get_field("department").type_class is other.get_class("Department"))
+        clear_model_cache(source)
+        self.assertEqual(Model(source).name, self.model.name)
+
     def testModelClasses(self):
         '''The model should have the correct number of classes, which behave correctly'''
         self.assertEqual(len(self.model.classes.items()), 19)
@@ -72,6 +86,11 @@ class TestModel(WebserviceTest):
             self.assertEqual(fd.name, f)
             self.assertTrue(isinstance(fd, Field))
 
+        attributes = ceo.attributes
+        attributes.append("not a field")
+        self.assertEqual(len(ceo.attributes) + 1, len(attributes))
+        self.assertEqual(ceo.fields, sorted(ceo.fields, key=lambda f: f.name))
+
         try:
             ceo.get_field("foo")
             self.fail("No ModelError thrown at non existent field")
@@ -85,6 +104,11 @@ class TestModel(WebserviceTest):
         self.assertTrue(isinstance(dep.get_field("name"), Attribute))
         self.assertTrue(isinstance(dep.get_field("employees"), Collection))
         self.assertTrue(isinstance(dep.get_field("company"), Reference))
+        names = lambda fields: [f.name for f in fields]
+        self.assertEqual(names(dep.attributes), ["id", "name"])
+        self.assertEqual(names(dep.references), ["company", "manager"])
+        self.assertEqual(names(dep.collections), ["employees", "rejectedEmployees"])
+        self.assertEqual(len(dep.fields), 6)
 
 class TestService(WebserviceTest):
      
@@ -101,6 +125,55 @@ class TestService(WebserviceTest):
         self.assertTrue(isinstance(q, Query), "Can make a query")
         self.assertEqual(q.model.name, "testmodel", "and it has the right model")
 
+    def testInflatingResponses(self):
+        """The service should be able to read gzipped responses"""
+        import gzip, StringIO
+        from intermine.webservice import _InflatingResponse
+        lines = ["line %d\n" % i for i in range(2000)]
+        buf = StringIO.StringIO()
+        f = gzip.GzipFile(fileobj=buf, mode="wb")
+        f.write("".join(lines))
+        f.close()
+        resp = _InflatingResponse(StringIO.StringIO(buf.getvalue()))
+        self.assertEqual(lines, list(resp))
+        resp = _InflatingResponse(StringIO.StringIO(buf.getvalue()))
+        self.assertEqual("line 0\nli", resp.read(9))
+        self.assertEqual("".join(lines)[9:], resp.read())
+
+    def testInflatingRedirectedResponses(self):
+        """The service should inflate gzipped responses it was redirected to once"""
+        import gzip, StringIO, threading
+        from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+        class GzipHandler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            def do_GET(self):
+                if self.path.startswith("/old"):
+                    self.send_response(302)
+                    self.send_header("Location", "/new")
+                    self.end_headers()
+                    return
+                buf = StringIO.StringIO()
+                f = gzip.GzipFile(fileobj=buf, mode="wb")
+                f.write("hello\nworld\n")
+                f.close()
+                self.send_response(200)
+                self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(buf.getvalue())))
+                self.end_headers()
+                self.wfile.write(buf.getvalue())
+        server = HTTPServer(("127.0.0.1", 0), GzipHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            root = "http://127.0.0.1:" + str(server.server_port)
+            opener = InterMineURLOpener()
+            self.assertEqual("hello\nworld\n", opener.open(root + "/new").read())
+            self.assertEqual("hello\nworld\n", opener.open(root + "/old").read())
+        finally:
+            server.shutdown()
+
 class TestQuery(WebserviceTest):
 
     model = None
@@ -280,6 +353,36 @@ class TestQuery(WebserviceTest):
         except ConstraintError, ex:
             self.assertEqual(ex.message, "'Manager' is not a subclass of 'Department.company.CEO'")
 
+    def testConstraintChanges(self):
+        """Constraints should reflect changes made after they have been serialised"""
+        con = self.q.add_constraint('Employee.age', '>', 50000)
+        self.assertEqual(con.to_dict()["value"], "50000")
+        con.op = "<"
+        con.value = 10
+        self.assertEqual(con.to_dict()["op"], "<")
+        self.assertEqual(con.to_dict()["value"], "10")
+        self.assertTrue(con.to_string().startswith("Employee.age < 10"))
+        con.value = 10.0
+        self.assertEqual(con.to_dict()["value"], "10.0")
+        self.assertTrue(con.to_string().startswith("Employee.age < 10.0"))
+        con.to_dict()["value"] = "corrupted"
+        self.assertEqual(con.to_dict()["value"], "10.0")
+        multi = self.q.add_constraint('Employee.name', 'ONE OF', ['John'])
+        self.assertTrue(multi.to_string().startswith("Employee.name ONE OF ['John']"))
+        multi.values.append('Paul')
+        self.assertTrue(multi.to_string().startswith("Employee.name ONE OF ['John', 'Paul']"))
+
+    def testConstraintCodes(self):
+        """Queries should be able to have more than 26 constraints"""
+        for i in range(28):
+            con = self.q.add_constraint("Employee.age", ">", i)
+        self.assertEqual(con.code, "AB")
+        self.assertEqual(self.q.get_constraint("AA").value, 26)
+        codes = [c.code for c in self.q.coded_constraints]
+        self.assertEqual(codes[:3], ["A", "B", "C"])
+        self.assertEqual(codes[-3:], ["Z", "AA", "AB"])
+        self.assertTrue(str(self.q.get_logic()).endswith("Y and Z and AA and AB"))
+
     def testLogic(self):
         """Queries should be able to parse good logic strings"""
         self.q.add_constraint("Employee.name", "IS NOT NULL")
@@ -289,6 +392,10 @@ class TestQuery(WebserviceTest):
             ["John", "Paul", "Mary"])
         self.q.add_constraint("Employee.department.employees", "Manager")
         self.assertEqual(str(self.q.get_logic()), "A and B and C and D")
+        self.q.add_view("Employee.name")
+        self.q.get_logic() | self.q.get_constraint("A")
+        self.assertEqual(str(self.q.get_logic()), "A and B and C and D")
+        self.assertTrue('constraintLogic="A and B and C and D"' in self.q.to_xml())
         self.q.set_logic("(B or C) and (A or D)")
         self.assertEqual(str(self.q.get_logic()), "(B or C) and (A or D)")
         self.q.set_logic("B and C or A and D")
@@ -302,6 +409,14 @@ class TestQuery(WebserviceTest):
         self.assertRaises(LogicParseError, self.q.set_logic, "A and ((B and C) and D))")
         self.assertRaises(LogicParseError, self.q.set_logic, "A and B( and C and D)")
         self.assertRaises(LogicParseError, self.q.set_logic, "A and (B and C and )D")
+        self.q.set_logic("(B or C) and (A or D)")
+        first = self.q.get_logic()
+        self.q.set_logic("(B or C) and (A or D)")
+        self.assertFalse(first is self.q.get_logic())
+        self.assertEqual(str(first), str(self.q.get_logic()))
+        self.q.add_constraint("Employee.age", "<", 50)
+        self.q.set_logic("E and C or A and D and B")
+        self.assertEqual(str(self.q.get_logic()), "E and (C or A) and D and B")
 
     def testJoins(self):
         """Queries should be able to add joins"""
@@ -313,6 +428,23 @@ class TestQuery(WebserviceTest):
         expected = "[<Join: Employee.department INNER>, <Join: Employee.department.company OUTER>]"
         self.assertEqual(expected, self.q.joins.__repr__())
 
+    def testPickling(self):
+        """Constraints, joins and sort orders should survive pickling"""
+        self.q.add_view("Employee.name", "Employee.age")
+        self.q.add_constraint("Employee.age", ">", 10)
+        self.q.add_constraint("Employee.name", "ONE OF", ["John", "Paul"])
+        self.q.add_constraint("Employee.department.employees", "Manager")
+        self.q.add_join("Employee.department", "outer")
+        self.q.add_sort_order("Employee.age", "desc")
+        features = (self.q.constraints + self.q.joins 
+                + list(self.q._sort_order_list))
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            for feature in features:
+                copy = pickle.loads(pickle.dumps(feature, protocol))
+                self.assertTrue(type(copy) is type(feature))
+                self.assertEqual(repr(copy), repr(feature))
+                self.assertEqual(feature.to_dict(), copy.to_dict())
+
     def testXML(self):
         """Queries should be able to serialise themselves to XML"""
         self.q.add_view("Employee.name", "Employee.age", "Employee.department.name")
@@ -329,6 +461,65 @@ class TestQuery(WebserviceTest):
         self.q.set_logic("(A and B) or (A and C and D) and (E or F)")
         expected ='<query constraintLogic="((A and B) or (A and C and D)) and (E or F)" longDescription="" model="testmodel" name="" sortOrder="Employee.age asc" view="Employee.name Employee.age Employee.department.name"><join path="Employee.department" style="OUTER"/><constraint code="A" op="IS NOT NULL" path="Employee.name"/><constraint code="B" op="&gt;" path="Employee.age" value="10"/><constraint code="C" extraValue="Wernham-Hogg" op="LOOKUP" path="Employee.department" value="Sales"/><constraint code="D" op="ONE OF" path="Employee.department.employees.name"><value>John</value><value>Paul</value><value>Mary</value></constraint><constraint code="E" loopPath="Employee" op="=" path="Employee.department.manager"/><constraint code="F" op="IN" path="Employee" value="some list of employees"/><constraint path="Employee.department.employees" type="Manager"/></query>'        
         self.assertEqual(expected, self.q.to_xml())
+        self.assertEqual(expected, ''.join(self.q.iter_xml()))
+
+    def testXMLCaching(self):
+        """Cached XML should be rebuilt whenever the query changes"""
+        self.q.add_view("Employee.name", "Employee.age")
+        con = self.q.add_constraint("Employee.age", ">", 10)
+        xml = self.q.to_xml()
+        self.assertTrue(xml is self.q.to_xml())
+        con.value = 20
+        self.assertTrue('value="20"' in self.q.to_xml())
+        self.q.name = "foo"
+        self.assertTrue('name="foo"' in self.q.to_xml())
+        self.q.add_sort_order("Employee.name")
+        self.assertTrue('sortOrder="Employee.name asc"' in self.q.to_xml())
+        self.q.add_join("Employee.department", "outer")
+        self.assertTrue('<join path="Employee.department"' in self.q.to_xml())
+
+    def testXMLCachingInPlaceChanges(self):
+        """Cached XML should be rebuilt when the query's parts are changed in place"""
+        self.q.add_view("Employee.name")
+        self.q.add_join("Employee.department", "outer")
+        sub = self.q.add_constraint("Employee.department.manager", "Manager")
+        multi = self.q.add_constraint("Employee.name", "ONE OF", ["John"])
+        self.q.to_xml()
+        self.q.views.append("Employee.age")
+        self.assertTrue('view="Employee.name Employee.age"' in self.q.to_xml())
+        self.q.joins[0].style = "INNER"
+        self.assertTrue('style="INNER"' in self.q.to_xml())
+        sub.subclass = "CEO"
+        self.assertTrue('type="CEO"' in self.q.to_xml())
+        multi.values.append("Paul")
+        self.assertTrue('<value>Paul</value>' in self.q.to_xml())
+
+    def testSubclassInPlaceChanges(self):
+        """Paths should be validated against subclass constraints changed in place"""
+        sub = self.q.add_constraint("Employee.department.manager", "Manager")
+        self.q.add_view("Employee.department.manager.name")
+        sub.subclass = "CEO"
+        self.q.add_view("Employee.department.manager.salary")
+        self.assertEqual(self.q.get_subclass_dict(), {"Employee.department.manager": "CEO"})
+
+    def testClone(self):
+        """Clones should have the same state, but be independent of the original"""
+        self.q.add_view("Employee.name", "Employee.age")
+        self.q.add_constraint("Employee.age", ">", 10)
+        self.q.add_constraint("Employee.name", "ONE OF", ["John", "Paul"])
+        self.q.add_constraint("Employee.name", "IS NOT NULL")
+        self.q.add_join("Employee.department", "outer")
+        self.q.add_sort_order("Employee.name")
+        self.q.set_logic("A or (B and C)")
+        clone = self.q.clone()
+        self.assertEqual(self.q.to_xml(), clone.to_xml())
+        clone.get_constraint("A").value = 20
+        clone.get_constraint("B").values.append("George")
+        clone.add_view("Employee.end")
+        self.assertEqual(10, self.q.get_constraint("A").value)
+        self.assertEqual(["John", "Paul"], self.q.get_constraint("B").values)
+        self.assertEqual(["Employee.name", "Employee.age"], self.q.views)
+        self.assertTrue(clone.get_logic().left is clone.get_constraint("A"))
 
     def testSugaryQueryConstruction(self):
         """Test use of operation coercion which is similar to SQLAlchemy"""
@@ -385,6 +576,38 @@ class TestTemplate(TestQuery):
         super(TestTemplate, self).setUp()
         self.q = Template(self.model)
 
+class TestList(unittest.TestCase):
+
+    def setUp(self):
+        class DummyManager:
+            def __init__(self):
+                self.calls = []
+            def union(self, lists, **kwargs):
+                self.calls.append(("union", lists))
+            def intersect(self, lists, **kwargs):
+                self.calls.append(("intersect", lists))
+            def xor(self, lists, **kwargs):
+                self.calls.append(("xor", lists))
+            def subtract(self, lefts, rights, **kwargs):
+                self.calls.append(("subtract", lefts, rights))
+        self.manager = DummyManager()
+        def make_list(name):
+            return List(service=None, manager=self.manager, name=name, title=None, type="Employee", size=10)
+        self.a, self.b, self.c = map(make_list, ["a", "b", "c"])
+
+    def testOperations(self):
+        """List operations should combine collections of operands in a single request"""
+        a, b, c = self.a, self.b, self.c
+        a | b
+        a & [b, c]
+        a ^ (b, c)
+        a - [b, c]
+        self.assertEqual(self.manager.calls, [
+            ("union", [a, b]),
+            ("intersect", [a, b, c]),
+            ("xor", [a, b, c]),
+            ("subtract", [a], [b, c])])
+
 class TestQueryResults(WebserviceTest):
 
     model = None
@@ -2,6 +2,7 @@ import unittest
 from test import WebserviceTest
 
 from intermine.webservice import *
+from intermine.query import ConstraintError
 
 class TestTemplates(WebserviceTest):
 
@@ -49,3 +50,16 @@ class TestTemplates(WebserviceTest):
         self.assertTrue(con.editable and con.optional and con.switched_on)
         con = t2.get_constraint("C")
         self.assertTrue(con.editable and con.optional and con.switched_off)
+
+    def testSwitchedOffConstraints(self):
+        """Switched off constraints should not be sent when running templates"""
+        t = self.service.get_template("SwitchableConstraints")
+        params = t.to_query_params()
+        self.assertEqual(params["constraint2"], "Company.departments.name")
+        self.assertFalse("constraint3" in params or "value3" in params)
+        params = t._get_adjusted_params({"B": {"value": "Sales"}})
+        self.assertEqual(params["value2"], "Sales")
+        self.assertFalse("constraint3" in params)
+        self.assertEqual(t.get_constraint("B").value, "Farm Supplies")
+        self.assertRaises(ConstraintError, t._get_adjusted_params, {"A": {"op": "IS NULL"}})
+        self.assertEqual(t.get_constraint("A").op, "=")